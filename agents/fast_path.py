@@ -0,0 +1,90 @@
+import threading
+from typing import Optional
+
+from langchain.agents.mrkl.output_parser import MRKLOutputParser
+from langchain_core.agents import AgentAction, AgentFinish
+
+from agents.local_llm_agent import SimpleLocalLLM, match_rules, normalize_question
+from evaluation.tracing import span
+from tools.toolkit import custom_tools
+
+# Labels SimpleLocalLLM searches the prompt for; a question containing one could be parsed differently
+REACT_LABELS = ("question:", "thought:", "action:", "action input:", "observation:", "final answer:")
+
+# Same prefixes ZeroShotAgent uses when it rebuilds the scratchpad
+OBSERVATION_PREFIX = "Observation: "
+LLM_PREFIX = "Thought:"
+
+
+class FastPathExecutor:
+    """
+    Runs the agent's two ReAct steps without the AgentExecutor loop: the same
+    SimpleLocalLLM produces the action, the same MRKL parser reads it, the tool
+    is called directly and the LLM turns the observation into the final answer.
+    Only prompt templating, callbacks and executor bookkeeping are skipped.
+
+    `run` returns None whenever routing is ambiguous (no rule or several rules
+    match, multi-line input, input containing ReAct labels, or any step that
+    doesn't go action → final answer); callers then use the full agent.
+    """
+
+    def __init__(self, llm: Optional[SimpleLocalLLM] = None, tools=None):
+        self.llm = llm or SimpleLocalLLM()
+        self.tools = {tool.name: tool for tool in (tools or custom_tools)}
+        self.parser = MRKLOutputParser()
+        self.routed = 0
+        self.fallbacks = 0
+        self._lock = threading.Lock()
+
+    def route(self, question: str) -> Optional[str]:
+        """Name of the one tool the agent would pick, or None if that isn't certain."""
+        stripped = question.strip()
+        lowered = stripped.lower()
+        if not stripped or "\n" in stripped or "\r" in stripped:
+            return None
+        if any(label in lowered for label in REACT_LABELS):
+            return None
+        matched, _ = match_rules(normalize_question(stripped))
+        return matched[0] if len(matched) == 1 else None
+
+    def run(self, question: str) -> Optional[str]:
+        tool_name = self.route(question)
+        output = None
+        if tool_name is not None:
+            with span("agent.fast_path", tool=tool_name):
+                try:
+                    output = self._run(question, tool_name)
+                except Exception:
+                    # Let the full agent reproduce (and report) whatever went wrong
+                    output = None
+        with self._lock:
+            if output is None:
+                self.fallbacks += 1
+            else:
+                self.routed += 1
+        return output
+
+    def _run(self, question: str, tool_name: str) -> Optional[str]:
+        prompt = f"Question: {question}\n{LLM_PREFIX}"
+        step = self.parser.parse(self.llm._call(prompt))
+        if not isinstance(step, AgentAction) or step.tool != tool_name:
+            return None
+        # Call the tool function itself; BaseTool.run only adds callback bookkeeping around it
+        observation = self.tools[step.tool].func(step.tool_input)
+        prompt += f"{step.log}\n{OBSERVATION_PREFIX}{observation}\n{LLM_PREFIX}"
+        step = self.parser.parse(self.llm._call(prompt))
+        if not isinstance(step, AgentFinish):
+            return None
+        return step.return_values["output"]
+
+
+_fast_path = None
+_fast_path_lock = threading.Lock()
+
+
+def get_fast_path() -> FastPathExecutor:
+    global _fast_path
+    with _fast_path_lock:
+        if _fast_path is None:
+            _fast_path = FastPathExecutor()
+        return _fast_path
@@ -1,6 +1,8 @@
 import sys
 import os
 import re
+import logging
+import threading
 from typing import List, Optional
 
 # ✅ Add project root to system path
@@ -9,6 +11,131 @@ sys.path.append(os.path.abspath(os.path.join(os.path.dirname(__file__), "..")))
 from langchain.llms.base import LLM
 from langchain.agents import initialize_agent, AgentType
 from tools.toolkit import custom_tools
+from evaluation.tracing import span
+
+
+logger = logging.getLogger(__name__)
+
+# ✅ Console tracing of the agent is opt-in
+AGENT_VERBOSE = os.getenv("LOCAL_AGENT_VERBOSE", "").lower() in ("1", "true", "yes")
+
+# Template placeholder LangChain puts in the format instructions
+PLACEHOLDER_OBSERVATION = "the result of the action"
+
+
+def _action(thought: str, tool: str, tool_input: str) -> str:
+    return (
+        f"Thought: {thought}\n"
+        f"Action: {tool}\n"
+        f"Action Input: \"{tool_input}\"\n"
+    )
+
+
+def _add_action(question, groups):
+    a, b = groups["add_a"], groups["add_b"]
+    return _action(f"I should add {a} and {b}", "add_numbers", f"{a} and {b}")
+
+
+def _reverse_action(question, groups):
+    text = question.replace("reverse", "").strip()
+    return _action("I should reverse the text", "reverse_string", text)
+
+
+def _greet_action(question, groups):
+    name = question.replace("greet", "").replace("the user", "").strip()
+    return _action("I should greet the user", "greet_user", name or "User")
+
+
+def _retrieve_action(question, groups):
+    return _action("I should retrieve facts from memory", "retrieve_facts", question)
+
+
+def _fallback_action(question, groups):
+    return _action("I should try retrieving something just in case", "retrieve_facts", question)
+
+
+# ✅ Rules in priority order: (name, pattern, action builder)
+RULES = (
+    ("add_numbers", r"add\s+(?P<add_a>\d+)\s*(?:and|&)?\s*(?P<add_b>\d+)", _add_action),
+    ("reverse_string", r"reverse", _reverse_action),
+    ("greet_user", r"greet", _greet_action),
+    ("retrieve_facts", r"what is|who is|define|capital|explain|how does", _retrieve_action),
+)
+RULE_ACTIONS = {name: action for name, _, action in RULES}
+
+# One optional lookahead per rule, so a single match reports every rule that fires
+RULE_PATTERN = re.compile(
+    "^" + "".join(f"(?:(?=.*?(?P<{name}>{pattern})))?" for name, pattern, _ in RULES),
+    re.DOTALL,
+)
+
+
+def match_rules(question: str):
+    """Return (names of every matching rule in priority order, captured groups)."""
+    groups = RULE_PATTERN.match(question).groupdict()
+    return [name for name, _, _ in RULES if groups[name] is not None], groups
+
+
+# `Label: value` fields, matched exactly as the agent always has: case-insensitively, left to
+# right and without overlaps, so "Question: Question: x" yields "question: x"
+FIELD_PATTERNS = {
+    label: re.compile(rf"{re.escape(label.lower())}\s*(.+)", re.IGNORECASE)
+    for label in ("Observation:", "Question:")
+}
+LABEL_PATTERNS = {label: re.compile(re.escape(label), re.IGNORECASE) for label in FIELD_PATTERNS}
+
+
+def _last_label(prompt: str, label: str, end: int) -> int:
+    """Start of the last case-insensitive `label` before `end`, searching backwards in growing windows."""
+    pattern = LABEL_PATTERNS[label]
+    size = 1024
+    while True:
+        low = max(0, end - size)
+        position = -1
+        for match in pattern.finditer(prompt, low, end):
+            position = match.start()
+        if position != -1 or low == 0:
+            return position
+        size *= 4
+
+
+def _window_start(prompt: str, label: str, end: int) -> int:
+    """
+    A line start at or before the last label occurrence that no earlier match
+    runs across: a match only spans a newline when its label is followed by
+    nothing but whitespace, so step back while that is the case.
+    """
+    position = _last_label(prompt, label, end)
+    while position > 0:
+        start = prompt.rfind("\n", 0, position) + 1
+        before = start
+        while before > 0 and prompt[before - 1].isspace():
+            before -= 1
+        if before < len(label) or not LABEL_PATTERNS[label].fullmatch(prompt, before - len(label), before):
+            return start
+        position = before - len(label)
+    return 0
+
+
+def _last_field(prompt: str, label: str) -> Optional[str]:
+    """
+    Lowercased value of the last `Label:` match in the prompt, or None.
+    Only the lines from the last label on are lowercased and matched, so the
+    cost of a step doesn't grow with the scratchpad before it.
+    """
+    pattern = FIELD_PATTERNS[label]
+    end = len(prompt)
+    while end > 0:
+        start = _window_start(prompt, label, end)
+        values = pattern.findall(prompt[start:end].lower())
+        if values:
+            return values[-1].strip()
+        end = start
+    return None
+
+
+def normalize_question(question: str) -> str:
+    return re.sub(r"\s+", " ", question.lower()).strip()
 
 
 class SimpleLocalLLM(LLM):
@@ -18,88 +145,39 @@ class SimpleLocalLLM(LLM):
     """
 
     def _call(self, prompt: str, stop: Optional[List[str]] = None) -> str:
-        print("\n⚙️ Inside _call:\n", prompt)
-        prompt = prompt.lower()
+        with span("llm.call", prompt_chars=len(prompt)):
+            return self._respond(prompt)
+
+    def _respond(self, prompt: str) -> str:
+        logger.debug("Inside _call:\n%s", prompt)
 
         # ✅ Always handle the latest observation as final answer
-        obs_matches = re.findall(r"observation:\s*(.+)", prompt, re.IGNORECASE)
-        if obs_matches:
-            last_observation = obs_matches[-1].strip()
-            if last_observation and last_observation != "the result of the action":
-                print("🧠 Responding to observation:", last_observation)
+        last_observation = _last_field(prompt, "Observation:")
+        if last_observation:
+            if last_observation != PLACEHOLDER_OBSERVATION:
                 output = (
                     "Thought: I now know the final answer\n"
                     f"Final Answer: {last_observation}"
                 )
-                print("🧪 Returning from _call():\n", output)
+                logger.debug("Responding to observation: %s", last_observation)
                 return output
 
         # ✅ Extract user question
-        question_match = re.findall(r"question:\s*(.+)", prompt, re.IGNORECASE)
-        if question_match:
-            question = question_match[-1].strip()
-        elif prompt.strip() and not prompt.strip().startswith("observation:"):
-            question = prompt.strip()
-        else:
-            print("⚠️ No valid question found — returning default.")
-            return "Final Answer: the result of the action"
-
-        question = re.sub(r"\s+", " ", question).strip()
-        print("🔍 Parsed question:", question)
-
-        # ➕ Add numbers
-        match = re.search(r"add\s+(\d+)\s*(?:and|&)?\s*(\d+)", question)
-        if match:
-            a, b = match.groups()
-            output = (
-                f"Thought: I should add {a} and {b}\n"
-                f"Action: add_numbers\n"
-                f"Action Input: \"{a} and {b}\"\n"
-            )
-            print("🧪 Returning from _call():\n", output)
-            return output
-
-        # 🔁 Reverse string
-        if "reverse" in question:
-            text = question.replace("reverse", "").strip()
-            output = (
-                "Thought: I should reverse the text\n"
-                "Action: reverse_string\n"
-                f"Action Input: \"{text}\"\n"
-            )
-            print("🧪 Returning from _call():\n", output)
-            return output
-
-        # 🙋 Greet user
-        if "greet" in question:
-            name = question.replace("greet", "").replace("the user", "").strip()
-            name = name or "User"
-            output = (
-                "Thought: I should greet the user\n"
-                "Action: greet_user\n"
-                f"Action Input: \"{name}\"\n"
-            )
-            print("🧪 Returning from _call():\n", output)
-            return output
-
-        # 📚 Retrieve facts
-        if any(kw in question for kw in ["what is", "who is", "define", "capital", "explain", "how does"]):
-            output = (
-                "Thought: I should retrieve facts from memory\n"
-                "Action: retrieve_facts\n"
-                f"Action Input: \"{question}\"\n"
-            )
-            print("🧪 Returning from _call():\n", output)
-            return output
-
-        # ❌ Fallback
-        print("⚠️ No match — using fallback.")
-        output = (
-            "Thought: I should try retrieving something just in case\n"
-            "Action: retrieve_facts\n"
-            f"Action Input: \"{question}\"\n"
-        )
-        print("🧪 Returning from _call():\n", output)
+        question = _last_field(prompt, "Question:")
+        if question is None:
+            stripped = prompt.strip()
+            if not stripped or stripped.lower().startswith("observation:"):
+                logger.debug("No valid question found — returning default.")
+                return "Final Answer: the result of the action"
+            question = stripped
+
+        question = normalize_question(question)
+        logger.debug("Parsed question: %s", question)
+
+        matched, groups = match_rules(question)
+        action = RULE_ACTIONS[matched[0]] if matched else _fallback_action
+        output = action(question, groups)
+        logger.debug("Returning from _call():\n%s", output)
         return output
 
     @property
@@ -108,14 +186,38 @@ class SimpleLocalLLM(LLM):
 
 
 # 🧠 Initialize Agent
-simple_llm = SimpleLocalLLM()
-local_agent = initialize_agent(
-    tools=custom_tools,
-    llm=simple_llm,
-    agent=AgentType.ZERO_SHOT_REACT_DESCRIPTION,
-    verbose=True,
-    handle_parsing_errors=True,
-)
+def build_local_agent(llm: Optional[LLM] = None, verbose: bool = AGENT_VERBOSE):
+    """
+    Build a fresh SimpleLocalLLM + ReAct agent executor.
+    Worker processes call this once so each owns its own executor.
+    """
+    return initialize_agent(
+        tools=custom_tools,
+        llm=llm or SimpleLocalLLM(),
+        agent=AgentType.ZERO_SHOT_REACT_DESCRIPTION,
+        verbose=verbose,
+        handle_parsing_errors=True,
+    )
+
+
+# ✅ The shared agent is built on first use, not at import
+_local_agent = None
+_local_agent_lock = threading.Lock()
+
+
+def get_local_agent():
+    global _local_agent
+    with _local_agent_lock:
+        if _local_agent is None:
+            _local_agent = build_local_agent()
+        return _local_agent
+
+
+def __getattr__(name):
+    # Keeps `from agents.local_llm_agent import local_agent` working lazily
+    if name == "local_agent":
+        return get_local_agent()
+    raise AttributeError(f"module {__name__!r} has no attribute {name!r}")
 
 # 🧪 CLI for Testing
 if __name__ == "__main__":
@@ -127,7 +229,7 @@ if __name__ == "__main__":
                 break
             if not user_input.strip():
                 continue
-            result = local_agent.invoke({"input": user_input})
+            result = get_local_agent().invoke({"input": user_input})
             output = result["output"] if isinstance(result, dict) else result
             print("🤖", output)
         except Exception as e:
@@ -1,29 +1,68 @@
-import pandas as pd
-import matplotlib.pyplot as plt
+import sys
 import os
+sys.path.append(os.path.abspath(os.path.join(os.path.dirname(__file__), "..")))
 from datetime import datetime
 import numpy as np
 
+from analysis.render import Chart, render_charts
+from analysis.results_store import ResultsStore
+from analysis.trends import risk_trends
+
 def find_latest_csv(results_dir="results/analysis"):
+    if not os.path.isdir(results_dir):
+        return None
     files = [f for f in os.listdir(results_dir) if f.endswith(".csv")]
     files.sort(reverse=True)
     return os.path.join(results_dir, files[0]) if files else None
 
-def plot_risk_score_bar_chart(df, timestamp):
-    df['risk_score'] = df['risk_score'].apply(lambda x: 1 if str(x).strip().lower() == "true" else 0)
-    pivot = df.pivot_table(index="category", columns="model", values="risk_score", aggfunc="mean")
-    ax = pivot.plot(kind="bar", figsize=(10, 6), title="Average Privacy Risk Score by Prompt Category")
+def load_latest_rollups(store=None):
+    """
+    Rollups of the most recent run from the results store. If the store is
+    empty, the latest legacy CSV is imported into it first.
+    """
+    store = store or ResultsStore()
+    run_id = store.latest_run_id()
+    if run_id is None:
+        latest_csv = find_latest_csv()
+        if latest_csv is None:
+            return None, None
+        print(f"📥 Importing legacy results from: {latest_csv}")
+        run_id = store.import_csv(latest_csv)
+    return run_id, store.rollup_frame(run_id)
+
+def draw_risk_score_bar_chart(fig, rollups):
+    ax = fig.subplots()
+    pivot = rollups.pivot_table(index="category", columns="model", values="risk_rate", aggfunc="mean")
+    pivot.plot(kind="bar", ax=ax, title="Average Privacy Risk Score by Prompt Category")
     ax.set_xlabel("Prompt Category")
     ax.set_ylabel("Average Risk Score (0 = Safe, 1 = Risky)")
     ax.legend(title="Model", loc="upper right")
-    plt.xticks(rotation=0)
-    plt.tight_layout()
-    bar_path = f"results/bar_risk_score_{timestamp}.png"
-    plt.savefig(bar_path, dpi=300, bbox_inches="tight")
-    plt.close()
-    print(f"📊 Risk score bar chart saved to {bar_path}")
-
-def plot_comparison_bar_chart(timestamp):
+    ax.tick_params(axis="x", labelrotation=0)
+
+def draw_risk_trends(fig, trends):
+    ax = fig.subplots()
+    pivot = trends.pivot_table(index="started_at", columns=["model", "category"], values="risk_rate")
+    pivot.index = [str(i)[:16] for i in pivot.index]
+    pivot.plot(marker="o", ax=ax, title="Privacy Risk Rate Across Runs")
+    ax.set_xlabel("Run Start")
+    ax.set_ylabel("Risk Rate (0 = Safe, 1 = Risky)")
+    ax.legend(title="Model / Category", loc="upper left", bbox_to_anchor=(1, 1))
+    for label in ax.get_xticklabels():
+        label.set_rotation(45)
+        label.set_horizontalalignment("right")
+
+def draw_risk_change(fig, trends):
+    ax = fig.subplots()
+    latest = trends[trends["run_id"] == trends["run_id"].iloc[-1]]
+    pivot = latest.pivot_table(index="category", columns="model", values="risk_rate_change")
+    pivot.plot(kind="bar", ax=ax, title="Change in Risk Rate vs Previous Run")
+    ax.axhline(0, color="black", linewidth=0.8)
+    ax.set_xlabel("Prompt Category")
+    ax.set_ylabel("Risk Rate Change")
+    ax.legend(title="Model", loc="upper right")
+    ax.tick_params(axis="x", labelrotation=0)
+
+def draw_comparison_bar_chart(fig, data=None):
     labels = ['Data Control', 'Auditability', 'Inference Cost', 'Response Time', 'Privacy Risk']
     hosted = [2, 2, 3, 3, 3]
     local = [5, 5, 1, 2, 1]
@@ -31,7 +70,7 @@ def plot_comparison_bar_chart(timestamp):
     x = np.arange(len(labels))
     width = 0.35
 
-    fig, ax = plt.subplots(figsize=(10, 6))
+    ax = fig.subplots()
     ax.bar(x - width / 2, hosted, width, label='OpenAI GPT-4o', color='gold')
     ax.bar(x + width / 2, local, width, label='Local Agent', color='orangered')
 
@@ -40,44 +79,52 @@ def plot_comparison_bar_chart(timestamp):
     ax.set_xticks(x)
     ax.set_xticklabels(labels)
     ax.legend()
-    plt.tight_layout()
-    bar_path = f"results/model_comparison_bar_{timestamp}.png"
-    plt.savefig(bar_path, dpi=300, bbox_inches="tight")
-    plt.close()
-    print(f"📊 Model comparison bar chart saved to {bar_path}")
 
-def plot_cost_vs_tokens(timestamp):
+def draw_cost_vs_tokens(fig, data=None):
     tokens = [1000, 5000, 10000, 20000, 50000]
     cost_per_token = 0.00000002  # Example OpenAI cost
     costs = [t * cost_per_token for t in tokens]
 
-    plt.figure(figsize=(8, 5))
-    plt.plot(tokens, costs, marker='o', linestyle='-', color='green')
-    plt.xlabel("Token Count")
-    plt.ylabel("Cost in USD")
-    plt.title("Estimated Embedding Cost vs Token Count")
-    plt.grid(True)
-    plt.tight_layout()
-    cost_path = f"results/embedding_cost_{timestamp}.png"
-    plt.savefig(cost_path, dpi=300, bbox_inches="tight")
-    plt.close()
-    print(f"📈 Cost plot saved to {cost_path}")
-
-def generate_dashboard():
+    ax = fig.subplots()
+    ax.plot(tokens, costs, marker='o', linestyle='-', color='green')
+    ax.set_xlabel("Token Count")
+    ax.set_ylabel("Cost in USD")
+    ax.set_title("Estimated Embedding Cost vs Token Count")
+    ax.grid(True)
+
+def dashboard_charts(rollups, trends):
+    """Every dashboard chart with the data it depends on."""
+    charts = [
+        Chart("bar_risk_score", draw_risk_score_bar_chart, rollups,
+              message="📊 Risk score bar chart saved to {path}"),
+    ]
+    if trends["run_id"].nunique() > 1:
+        charts += [
+            Chart("risk_trends", draw_risk_trends, trends, figsize=(12, 6),
+                  message="📈 Risk trend chart saved to {path}"),
+            Chart("risk_change", draw_risk_change, trends,
+                  message="📊 Risk change chart saved to {path}"),
+        ]
+    charts += [
+        Chart("model_comparison_bar", draw_comparison_bar_chart,
+              message="📊 Model comparison bar chart saved to {path}"),
+        Chart("embedding_cost", draw_cost_vs_tokens, figsize=(8, 5),
+              message="📈 Cost plot saved to {path}"),
+    ]
+    return charts
+
+def generate_dashboard(max_workers=None):
     print("📊 generate_dashboard() has started...")
     os.makedirs("results/analysis", exist_ok=True)
 
-    latest_csv = find_latest_csv()
-    if latest_csv:
-        print(f"📊 Plotting results from: {latest_csv}")
-        df = pd.read_csv(latest_csv)
+    run_id, rollups = load_latest_rollups()
+    if run_id is not None and not rollups.empty:
+        print(f"📊 Plotting results from run: {run_id}")
         timestamp = datetime.now().strftime("%Y%m%d_%H%M%S")
-        os.makedirs("results", exist_ok=True)
-        plot_risk_score_bar_chart(df, timestamp)
-        plot_comparison_bar_chart(timestamp)
-        plot_cost_vs_tokens(timestamp)
-    else:
-        print("❌ No results file found in 'results/analysis' folder.")
+        # Charts whose data is unchanged since the last render are skipped
+        return render_charts(dashboard_charts(rollups, risk_trends()), timestamp, max_workers=max_workers)
+    print("❌ No results found in the results store or 'results/analysis' folder.")
+    return {}
 
 if __name__ == "__main__":
     generate_dashboard()
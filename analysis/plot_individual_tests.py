@@ -1,23 +1,13 @@
-import pandas as pd
-import matplotlib.pyplot as plt
+import sys
 import os
+sys.path.append(os.path.abspath(os.path.join(os.path.dirname(__file__), "..")))
 from datetime import datetime
 
-def plot_individual_test_risks():
-    results_dir = "results"
-    files = [f for f in os.listdir(results_dir) if f.endswith(".csv")]
-    files.sort(reverse=True)
-
-    if not files:
-        print("❌ No CSV files found.")
-        return
-
-    latest_file = os.path.join(results_dir, files[0])
-    df = pd.read_csv(latest_file)
-
-    # Normalize risk_score column
-    df['risk_score'] = df['risk_score'].apply(lambda x: 1 if str(x).lower().strip() == 'true' else 0)
+from analysis.generate_dashboard import load_latest_rollups
+from analysis.render import Chart, render_charts
+from analysis.results_store import ResultsStore
 
+def draw_individual_test_risks(fig, df):
     # Pivot for side-by-side comparison
     pivot_df = df.pivot_table(index="prompt", columns="model", values="risk_score", aggfunc="first").fillna(0)
 
@@ -25,17 +15,27 @@ def plot_individual_test_risks():
     pivot_df = pivot_df.sort_values(by=list(pivot_df.columns), ascending=False)
 
     # Plot grouped bars
-    ax = pivot_df.plot(kind="barh", figsize=(12, 8), color=["orange", "skyblue"])
-    plt.xlabel("Risk Score (1 = High Risk)")
-    plt.title("Privacy Risk Comparison per Prompt by Model")
-    plt.legend(title="Model")
-    plt.tight_layout()
+    ax = fig.subplots()
+    pivot_df.plot(kind="barh", ax=ax, color=["orange", "skyblue"])
+    ax.set_xlabel("Risk Score (1 = High Risk)")
+    ax.set_title("Privacy Risk Comparison per Prompt by Model")
+    ax.legend(title="Model")
+
+def plot_individual_test_risks():
+    store = ResultsStore()
+    run_id, _ = load_latest_rollups(store)
+    if run_id is None:
+        print("❌ No results found in the results store.")
+        return
+
+    # risk_score is stored as 0/1, so no per-row parsing is needed
+    df = store.results_frame(run_id, columns=("prompt", "model", "risk_score"))
 
     timestamp = datetime.now().strftime("%Y%m%d_%H%M%S")
-    path = f"results/individual_test_risks_{timestamp}.png"
-    plt.savefig(path)
-    plt.show()
-    print(f"✅ Saved updated individual test comparison chart to {path}")
+    chart = Chart("individual_test_risks", draw_individual_test_risks, df, figsize=(12, 8), dpi=100,
+                  message="✅ Saved updated individual test comparison chart to {path}",
+                  savefig_kwargs={})
+    return render_charts([chart], timestamp)["individual_test_risks"]
 
 if __name__ == "__main__":
     plot_individual_test_risks()
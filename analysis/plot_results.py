@@ -1,35 +1,29 @@
-import pandas as pd
-import matplotlib.pyplot as plt
+import sys
 import os
+sys.path.append(os.path.abspath(os.path.join(os.path.dirname(__file__), "..")))
 from datetime import datetime
 
-# Load the most recent result file from the results folder
-def find_latest_csv(results_dir="results"):
-    files = [f for f in os.listdir(results_dir) if f.endswith(".csv")]
-    files.sort(reverse=True)
-    return os.path.join(results_dir, files[0]) if files else None
-
-def plot_results(csv_path):
-    df = pd.read_csv(csv_path)
-    df['risk_score'] = df['risk_score'].apply(lambda x: 1 if x == True or x == 'True' else 0)
+from analysis.generate_dashboard import load_latest_rollups
+from analysis.render import Chart, render_charts
 
+def draw_results(fig, rollups):
     # Bar chart: Average risk score per model and category
-    pivot = df.pivot_table(index="category", columns="model", values="risk_score", aggfunc="mean")
-    ax = pivot.plot(kind="bar", figsize=(8, 5), title="Average Risk Score by Prompt Category")
-    plt.ylabel("Average Risk Score (0-1)")
-    plt.tight_layout()
+    ax = fig.subplots()
+    pivot = rollups.pivot_table(index="category", columns="model", values="risk_rate", aggfunc="mean")
+    pivot.plot(kind="bar", ax=ax, title="Average Risk Score by Prompt Category")
+    ax.set_ylabel("Average Risk Score (0-1)")
 
+def plot_results(rollups):
     # Export chart as PNG
     timestamp = datetime.now().strftime("%Y%m%d_%H%M%S")
-    output_path = f"results/privacy_plot_{timestamp}.png"
-    plt.savefig(output_path)
-    print(f"📸 Chart saved to {output_path}")
-    plt.show()
+    chart = Chart("privacy_plot", draw_results, rollups, figsize=(8, 5), dpi=100,
+                  message="📸 Chart saved to {path}", savefig_kwargs={})
+    return render_charts([chart], timestamp)["privacy_plot"]
 
 if __name__ == "__main__":
-    latest_csv = find_latest_csv()
-    if latest_csv:
-        print(f"📊 Plotting results from: {latest_csv}")
-        plot_results(latest_csv)
+    run_id, rollups = load_latest_rollups()
+    if run_id is not None:
+        print(f"📊 Plotting results from run: {run_id}")
+        plot_results(rollups)
     else:
-        print("❌ No results file found in 'results' folder.")
+        print("❌ No results found in the results store.")
@@ -1,8 +1,13 @@
-import pandas as pd
-import matplotlib.pyplot as plt
+import sys
 import os
+sys.path.append(os.path.abspath(os.path.join(os.path.dirname(__file__), "..")))
+import pandas as pd
 from datetime import datetime
 
+from analysis.generate_dashboard import load_latest_rollups
+from analysis.render import Chart, render_charts
+from analysis.results_store import ResultsStore
+
 # Define mapping: keyword in prompt → category label
 CATEGORY_MAP = {
     "firestore": "Response logging via Firestore",
@@ -17,30 +22,35 @@ def infer_category(prompt):
             return label
     return None  # Unmatched prompts won't be included
 
-def plot_privacy_risk_categories(csv_path):
-    df = pd.read_csv(csv_path)
-    df['risk_score'] = df['risk_score'].apply(lambda x: 1 if str(x).lower() == "true" else 0)
-    df['test_case'] = df['prompt'].apply(infer_category)
+def infer_categories(prompts):
+    """Vectorised infer_category over a Series of prompts; first matching keyword wins."""
+    labels = pd.Series(None, index=prompts.index, dtype=object)
+    lowered = prompts.fillna("").str.lower()
+    for keyword, label in CATEGORY_MAP.items():
+        labels = labels.where(labels.notna() | ~lowered.str.contains(keyword.lower(), regex=False), label)
+    return labels
+
+def draw_risk_categories(fig, summary):
+    ax = fig.subplots()
+    summary.plot(kind="barh", ax=ax, color="skyblue")
+    ax.set_title("Privacy Risk Evaluation of Test Cases")
+    ax.set_xlabel("Risk Score (1 = Low, 3 = High)")
+
+def plot_privacy_risk_categories(df):
+    df = df.assign(test_case=infer_categories(df['prompt']))
     df = df.dropna(subset=['test_case'])
 
     summary = df.groupby('test_case')['risk_score'].sum().sort_values()
 
-    plt.figure(figsize=(10, 6))
-    summary.plot(kind="barh", color="skyblue")
-    plt.title("Privacy Risk Evaluation of Test Cases")
-    plt.xlabel("Risk Score (1 = Low, 3 = High)")
-    plt.tight_layout()
-
     timestamp = datetime.now().strftime("%Y%m%d_%H%M%S")
-    output_path = os.path.join("results", f"risk_categories_{timestamp}.png")
-    plt.savefig(output_path)
-    print(f"✅ Saved to {output_path}")
-    plt.show()
+    chart = Chart("risk_categories", draw_risk_categories, summary, dpi=100,
+                  message="✅ Saved to {path}", savefig_kwargs={})
+    return render_charts([chart], timestamp)["risk_categories"]
 
 if __name__ == "__main__":
-    results_dir = "results"
-    latest_csv = sorted(
-        [f for f in os.listdir(results_dir) if f.endswith(".csv")],
-        reverse=True
-    )[0]
-    plot_privacy_risk_categories(os.path.join(results_dir, latest_csv))
+    store = ResultsStore()
+    run_id, _ = load_latest_rollups(store)
+    if run_id is not None:
+        plot_privacy_risk_categories(store.results_frame(run_id, columns=("prompt", "risk_score")))
+    else:
+        print("❌ No results found in the results store.")
@@ -0,0 +1,120 @@
+import hashlib
+import json
+import os
+import pickle
+from concurrent.futures import ProcessPoolExecutor
+from dataclasses import dataclass, field
+from typing import Any, Callable, Dict, List, Optional
+
+import matplotlib
+matplotlib.use("Agg")  # ✅ Headless: never open windows or block on plt.show()
+from matplotlib.figure import Figure
+
+RENDER_CACHE_PATH = "results/.render_cache.json"
+
+
+@dataclass
+class Chart:
+    """
+    One chart to render. `draw(fig, data)` must be a module-level function so
+    it can run in a worker process; `name` is the stable key used to skip
+    charts whose inputs haven't changed.
+    """
+    name: str
+    draw: Callable[[Figure, Any], None]
+    data: Any = None
+    figsize: tuple = (10, 6)
+    dpi: int = 300
+    message: str = "📊 Chart saved to {path}"
+    savefig_kwargs: Dict[str, Any] = field(default_factory=lambda: {"bbox_inches": "tight"})
+
+
+def _fingerprint(data) -> bytes:
+    try:
+        import pandas as pd
+        if isinstance(data, (pd.DataFrame, pd.Series)):
+            columns = repr(list(data.columns)) if isinstance(data, pd.DataFrame) else repr(data.name)
+            return columns.encode("utf-8") + pd.util.hash_pandas_object(data, index=True).values.tobytes()
+    except ImportError:
+        pass
+    return pickle.dumps(data)
+
+
+def chart_hash(chart: Chart) -> str:
+    digest = hashlib.sha256()
+    digest.update(f"{chart.draw.__module__}.{chart.draw.__qualname__}".encode("utf-8"))
+    digest.update(repr((chart.figsize, chart.dpi, sorted(chart.savefig_kwargs.items()))).encode("utf-8"))
+    digest.update(_fingerprint(chart.data))
+    return digest.hexdigest()
+
+
+def render_figure(draw, data, figsize, dpi, path, savefig_kwargs) -> str:
+    """Draw onto a standalone Figure (no pyplot global state) and save it."""
+    fig = Figure(figsize=figsize)
+    draw(fig, data)
+    fig.tight_layout()
+    fig.savefig(path, dpi=dpi, **savefig_kwargs)
+    return path
+
+
+def _load_cache(cache_path: str) -> dict:
+    if not os.path.exists(cache_path):
+        return {}
+    try:
+        with open(cache_path, "r", encoding="utf-8") as f:
+            return json.load(f)
+    except (OSError, ValueError):
+        return {}
+
+
+def _save_cache(cache: dict, cache_path: str):
+    os.makedirs(os.path.dirname(cache_path) or ".", exist_ok=True)
+    tmp_path = cache_path + ".tmp"
+    with open(tmp_path, "w", encoding="utf-8") as f:
+        json.dump(cache, f, indent=2, sort_keys=True)
+    os.replace(tmp_path, cache_path)
+
+
+def render_charts(charts: List[Chart], timestamp: str, output_dir: str = "results",
+                  max_workers: Optional[int] = None, cache_path: str = RENDER_CACHE_PATH) -> Dict[str, str]:
+    """
+    Render charts concurrently in a process pool, skipping any chart whose
+    input hash matches its last render and whose image still exists.
+    Returns {chart name: image path}. `max_workers=0` renders in-process.
+    """
+    os.makedirs(output_dir, exist_ok=True)
+    cache = _load_cache(cache_path)
+    paths, todo = {}, []
+
+    for chart in charts:
+        digest = chart_hash(chart)
+        previous = cache.get(chart.name)
+        if previous and previous["hash"] == digest and os.path.exists(previous["path"]):
+            paths[chart.name] = previous["path"]
+            print(f"⏭️ {chart.name} unchanged, keeping {previous['path']}")
+            continue
+        path = os.path.join(output_dir, f"{chart.name}_{timestamp}.png")
+        todo.append((chart, digest, path))
+
+    def finished(chart, digest, path):
+        paths[chart.name] = path
+        cache[chart.name] = {"hash": digest, "path": path}
+        print(chart.message.format(path=path))
+
+    if todo and (max_workers == 0 or len(todo) == 1):
+        for chart, digest, path in todo:
+            render_figure(chart.draw, chart.data, chart.figsize, chart.dpi, path, chart.savefig_kwargs)
+            finished(chart, digest, path)
+    elif todo:
+        workers = min(len(todo), max_workers or os.cpu_count() or 1)
+        with ProcessPoolExecutor(max_workers=workers) as executor:
+            futures = [
+                (executor.submit(render_figure, chart.draw, chart.data, chart.figsize,
+                                 chart.dpi, path, chart.savefig_kwargs), chart, digest)
+                for chart, digest, path in todo
+            ]
+            for future, chart, digest in futures:
+                finished(chart, digest, future.result())
+
+    _save_cache(cache, cache_path)
+    return paths
@@ -0,0 +1,209 @@
+import csv
+import json
+import os
+import sqlite3
+import threading
+from collections import Counter
+from datetime import datetime
+
+DEFAULT_STORE_PATH = "results/results.sqlite3"
+
+# ✅ Columns of the raw results table, in insert order
+RESULT_COLUMNS = [
+    "run_id", "timestamp", "model", "category", "prompt", "response", "risk_score", "severity", "findings",
+]
+
+SCHEMA = """
+CREATE TABLE IF NOT EXISTS runs (
+    run_id TEXT PRIMARY KEY,
+    started_at TEXT NOT NULL,
+    source TEXT,
+    prompt_revision TEXT,
+    model_versions TEXT
+);
+CREATE TABLE IF NOT EXISTS results (
+    id INTEGER PRIMARY KEY,
+    run_id TEXT NOT NULL REFERENCES runs(run_id),
+    timestamp TEXT,
+    model TEXT NOT NULL,
+    category TEXT NOT NULL,
+    prompt TEXT,
+    response TEXT,
+    risk_score INTEGER,
+    severity TEXT,
+    findings TEXT
+);
+CREATE INDEX IF NOT EXISTS idx_results_run ON results (run_id, model, category);
+CREATE TABLE IF NOT EXISTS rollups (
+    run_id TEXT NOT NULL,
+    model TEXT NOT NULL,
+    category TEXT NOT NULL,
+    total INTEGER NOT NULL DEFAULT 0,
+    risky INTEGER NOT NULL DEFAULT 0,
+    errors INTEGER NOT NULL DEFAULT 0,
+    PRIMARY KEY (run_id, model, category)
+);
+"""
+
+
+def normalize_risk(value):
+    """Map the runner's risk values to 1 / 0, or None for ERROR rows."""
+    if isinstance(value, bool):
+        return int(value)
+    text = str(value).strip().lower()
+    if text == "true":
+        return 1
+    if text == "error":
+        return None
+    return 0
+
+
+class ResultsStore:
+    """
+    One SQLite file holding every run's raw rows plus per-(run, model, category)
+    rollups. Rollups are updated in the same transaction as each append, so
+    dashboards read a handful of aggregate rows instead of re-parsing results.
+    """
+
+    def __init__(self, path: str = DEFAULT_STORE_PATH):
+        self.path = path
+        os.makedirs(os.path.dirname(path) or ".", exist_ok=True)
+        self._lock = threading.Lock()
+        self._conn = sqlite3.connect(path, check_same_thread=False)
+        with self._conn:
+            self._conn.execute("PRAGMA journal_mode=WAL")
+            self._conn.executescript(SCHEMA)
+            self._migrate()
+
+    def _migrate(self):
+        # Stores created before run metadata existed lack these columns
+        columns = {row[1] for row in self._conn.execute("PRAGMA table_info(runs)")}
+        for column in ("prompt_revision", "model_versions"):
+            if column not in columns:
+                self._conn.execute(f"ALTER TABLE runs ADD COLUMN {column} TEXT")
+
+    def close(self):
+        with self._lock:
+            self._conn.close()
+
+    def __enter__(self):
+        return self
+
+    def __exit__(self, *exc):
+        self.close()
+
+    def start_run(self, run_id: str, started_at: str = None, source: str = None,
+                  prompt_revision: str = None, model_versions: dict = None):
+        """Register a run; starting an existing run (e.g. on resume) is a no-op."""
+        with self._lock, self._conn:
+            self._conn.execute(
+                "INSERT OR IGNORE INTO runs "
+                "(run_id, started_at, source, prompt_revision, model_versions) VALUES (?, ?, ?, ?, ?)",
+                (run_id, started_at or datetime.now().isoformat(), source, prompt_revision,
+                 json.dumps(model_versions, sort_keys=True) if model_versions else None),
+            )
+
+    def append(self, run_id: str, rows):
+        """Insert result rows and fold them into the rollups in one transaction."""
+        records = []
+        deltas = {}
+        for row in rows:
+            risk = normalize_risk(row.get("risk_score"))
+            records.append((
+                run_id, row.get("timestamp"), row["model"], row["category"], row.get("prompt"),
+                row.get("response"), risk, row.get("severity") or "", row.get("findings") or "",
+            ))
+            key = (row["model"], row["category"])
+            total, risky, errors = deltas.get(key, (0, 0, 0))
+            deltas[key] = (total + 1, risky + (risk == 1), errors + (risk is None))
+        if not records:
+            return
+
+        with self._lock, self._conn:
+            self._conn.executemany(
+                f"INSERT INTO results ({', '.join(RESULT_COLUMNS)}) "
+                f"VALUES ({', '.join('?' for _ in RESULT_COLUMNS)})",
+                records,
+            )
+            self._conn.executemany(
+                "INSERT INTO rollups (run_id, model, category, total, risky, errors) "
+                "VALUES (?, ?, ?, ?, ?, ?) "
+                "ON CONFLICT (run_id, model, category) DO UPDATE SET "
+                "total = total + excluded.total, risky = risky + excluded.risky, "
+                "errors = errors + excluded.errors",
+                [(run_id, model, category, *counts) for (model, category), counts in deltas.items()],
+            )
+
+    def run_ids(self):
+        with self._lock:
+            return [r[0] for r in self._conn.execute("SELECT run_id FROM runs ORDER BY started_at")]
+
+    def latest_run_id(self):
+        with self._lock:
+            row = self._conn.execute(
+                "SELECT run_id FROM runs ORDER BY started_at DESC LIMIT 1"
+            ).fetchone()
+        return row[0] if row else None
+
+    def query_frame(self, sql: str, params=()):
+        import pandas as pd
+        with self._lock:
+            return pd.read_sql_query(sql, self._conn, params=params)
+
+    def rollup_frame(self, run_id: str = None):
+        """Rollups with a `risk_rate` column, for one run or all runs."""
+        sql = (
+            "SELECT r.run_id, u.started_at, u.prompt_revision, r.model, r.category, "
+            "r.total, r.risky, r.errors, "
+            "CAST(r.risky AS REAL) / r.total AS risk_rate "
+            "FROM rollups r JOIN runs u ON u.run_id = r.run_id"
+        )
+        if run_id is not None:
+            return self.query_frame(sql + " WHERE r.run_id = ?", (run_id,))
+        return self.query_frame(sql + " ORDER BY u.started_at")
+
+    def results_frame(self, run_id: str, columns=("model", "category", "prompt", "risk_score")):
+        """Selected raw columns for one run; ERROR rows count as 0 risk."""
+        selected = ", ".join(
+            "COALESCE(risk_score, 0) AS risk_score" if c == "risk_score" else c
+            for c in columns if c in RESULT_COLUMNS
+        )
+        return self.query_frame(f"SELECT {selected} FROM results WHERE run_id = ?", (run_id,))
+
+    def import_csv(self, csv_path: str, run_id: str = None):
+        """Backfill a results CSV written before the store existed."""
+        run_id = run_id or os.path.splitext(os.path.basename(csv_path))[0]
+        with self._lock:
+            exists = self._conn.execute("SELECT 1 FROM runs WHERE run_id = ?", (run_id,)).fetchone()
+        if exists:
+            return run_id
+        started_at = datetime.fromtimestamp(os.path.getmtime(csv_path)).isoformat()
+        self.start_run(run_id, started_at=started_at, source=csv_path)
+        self.backfill_csv(run_id, csv_path)
+        return run_id
+
+    def backfill_csv(self, run_id: str, csv_path: str) -> int:
+        """
+        Append the CSV rows this run is missing, e.g. rows written just before
+        a crash that never reached the store. Returns how many were added.
+        """
+        with self._lock:
+            stored = Counter(self._conn.execute(
+                "SELECT model, category, prompt FROM results WHERE run_id = ?", (run_id,)
+            ))
+        added = 0
+        with open(csv_path, "r", newline="", encoding="utf-8") as f:
+            batch = []
+            for row in csv.DictReader(f):
+                key = (row.get("model"), row.get("category"), row.get("prompt"))
+                if stored[key]:
+                    stored[key] -= 1
+                    continue
+                batch.append(row)
+                if len(batch) >= 1000:
+                    self.append(run_id, batch)
+                    added += len(batch)
+                    batch = []
+            self.append(run_id, batch)
+            added += len(batch)
+        return added
@@ -0,0 +1,106 @@
+import sqlite3
+from contextlib import closing
+
+import pandas as pd
+
+from analysis.results_store import RESULT_COLUMNS, ResultsStore
+
+# ✅ Rows per chunk when scanning raw results; bounds memory on large histories
+DEFAULT_CHUNKSIZE = 100_000
+
+SEVERITY_LEVELS = ("low", "medium", "high")
+
+
+def _where(models=None, categories=None, since=None, until=None, run_ids=None,
+           min_severity=None, prompt_contains=None):
+    """Build a WHERE clause so filtering happens inside SQLite, not in pandas."""
+    clauses, params = [], []
+    for column, values in (("r.model", models), ("r.category", categories), ("r.run_id", run_ids)):
+        if values:
+            values = list(values)
+            clauses.append(f"{column} IN ({', '.join('?' for _ in values)})")
+            params.extend(values)
+    if since:
+        clauses.append("u.started_at >= ?")
+        params.append(since)
+    if until:
+        clauses.append("u.started_at < ?")
+        params.append(until)
+    if min_severity:
+        allowed = SEVERITY_LEVELS[SEVERITY_LEVELS.index(min_severity):]
+        clauses.append(f"r.severity IN ({', '.join('?' for _ in allowed)})")
+        params.extend(allowed)
+    if prompt_contains:
+        clauses.append("r.prompt LIKE ?")
+        params.append(f"%{prompt_contains}%")
+    return (" WHERE " + " AND ".join(clauses)) if clauses else "", params
+
+
+def scan_results(store: ResultsStore, columns=("run_id", "model", "category", "risk_score"),
+                 chunksize: int = DEFAULT_CHUNKSIZE, **filters):
+    """
+    Yield DataFrame chunks of the raw results across every run, reading only
+    the requested columns and rows. Uses its own read-only connection so a
+    long scan never blocks writers.
+    """
+    selected = [f"r.{c}" for c in columns if c in RESULT_COLUMNS]
+    if "started_at" in columns:
+        selected.append("u.started_at")
+    where, params = _where(**filters)
+    sql = f"SELECT {', '.join(selected)} FROM results r JOIN runs u ON u.run_id = r.run_id{where}"
+
+    with closing(sqlite3.connect(f"file:{store.path}?mode=ro", uri=True)) as conn:
+        yield from pd.read_sql_query(sql, conn, params=params, chunksize=chunksize)
+
+
+def _finish(counts: pd.DataFrame, runs: pd.DataFrame) -> pd.DataFrame:
+    """Attach run metadata, compute rates and run-over-run changes."""
+    trends = counts.merge(runs, on="run_id", how="left").sort_values(["started_at", "model", "category"])
+    trends["risk_rate"] = trends["risky"] / trends["total"]
+    trends["risk_rate_change"] = trends.groupby(["model", "category"])["risk_rate"].diff()
+    return trends.reset_index(drop=True)
+
+
+def risk_trends(store: ResultsStore = None, chunksize: int = DEFAULT_CHUNKSIZE, **filters) -> pd.DataFrame:
+    """
+    Per-(run, model, category) risk rates across the whole history, with the
+    change from the previous run of the same model and category.
+
+    Filters on model, category, run or time come straight from the rollups.
+    Row-level filters (min_severity, prompt_contains) scan the raw results in
+    chunks, aggregating each chunk before combining, so memory stays bounded.
+    """
+    store = store or ResultsStore()
+    runs = store.query_frame("SELECT run_id, started_at, prompt_revision, model_versions FROM runs")
+    row_level = filters.get("min_severity") or filters.get("prompt_contains")
+
+    if not row_level:
+        where, params = _where(**filters)
+        counts = store.query_frame(
+            "SELECT r.run_id, r.model, r.category, r.total, r.risky, r.errors "
+            f"FROM rollups r JOIN runs u ON u.run_id = r.run_id{where}",
+            params,
+        )
+        return _finish(counts, runs)
+
+    partials = []
+    for chunk in scan_results(store, chunksize=chunksize, **filters):
+        chunk = chunk.assign(
+            risky=chunk["risk_score"].eq(1).astype(int),
+            errors=chunk["risk_score"].isna().astype(int),
+        )
+        partials.append(
+            chunk.groupby(["run_id", "model", "category"])
+            .agg(total=("risky", "size"), risky=("risky", "sum"), errors=("errors", "sum"))
+        )
+    if not partials:
+        return _finish(pd.DataFrame(columns=["run_id", "model", "category", "total", "risky", "errors"]), runs)
+    counts = pd.concat(partials).groupby(level=[0, 1, 2]).sum().reset_index()
+    return _finish(counts, runs)
+
+
+def model_summary(trends: pd.DataFrame) -> pd.DataFrame:
+    """Pooled risk rate per model and category over all selected runs."""
+    summary = trends.groupby(["model", "category"])[["total", "risky", "errors"]].sum()
+    summary["risk_rate"] = summary["risky"] / summary["total"]
+    return summary.reset_index()
@@ -0,0 +1,179 @@
+import hashlib
+import json
+import random
+import struct
+import sys
+import threading
+import time
+from http.server import BaseHTTPRequestHandler, ThreadingHTTPServer
+
+# ✅ Same width as text-embedding-ada-002; the benchmark indexes these into a scratch store, never the real one
+EMBEDDING_DIM = 1536
+
+
+def fake_embedding(text: str, dim: int = EMBEDDING_DIM):
+    """Deterministic unit vector derived from the text's hash."""
+    seed = hashlib.sha256(text.encode("utf-8")).digest()
+    values = []
+    counter = 0
+    while len(values) < dim:
+        block = hashlib.sha256(seed + struct.pack(">I", counter)).digest()
+        values.extend(b / 127.5 - 1.0 for b in block)
+        counter += 1
+    values = values[:dim]
+    norm = sum(v * v for v in values) ** 0.5 or 1.0
+    return [v / norm for v in values]
+
+
+def fake_completion(prompt: str) -> str:
+    """Canned reply; echoes sensitive-looking prompts so the detectors have work to do."""
+    if any(word in prompt.lower() for word in ("ssn", "card", "password", "key")):
+        return f"I can't help with sharing that. You wrote: {prompt}"
+    return f"Here is a short answer to: {prompt}"
+
+
+class MockOpenAIHandler(BaseHTTPRequestHandler):
+    server_version = "MockOpenAI/1.0"
+    protocol_version = "HTTP/1.1"
+    # Headers and body go out in separate writes; with Nagle on, the body waits on a delayed ACK
+    disable_nagle_algorithm = True
+
+    def log_message(self, format, *args):
+        pass
+
+    def _send_json(self, status: int, payload: dict, headers=None):
+        body = json.dumps(payload).encode("utf-8")
+        self.send_response(status)
+        self.send_header("Content-Type", "application/json")
+        self.send_header("Content-Length", str(len(body)))
+        for key, value in (headers or {}).items():
+            self.send_header(key, value)
+        self.end_headers()
+        self.wfile.write(body)
+
+    def _send_stream(self, request: dict, content: str, prompt: str):
+        """Server-sent events, one word per chunk, like a streamed chat completion."""
+        self.send_response(200)
+        self.send_header("Content-Type", "text/event-stream")
+        self.send_header("Connection", "close")
+        self.end_headers()
+        self.close_connection = True
+        base = {"id": "chatcmpl-mock", "object": "chat.completion.chunk", "created": int(time.time()),
+                "model": request.get("model", "gpt-4o")}
+        words = content.split(" ")
+        try:
+            for i, word in enumerate(words):
+                delta = {"content": word if i == 0 else " " + word}
+                if i == 0:
+                    delta["role"] = "assistant"
+                event = {**base, "choices": [{"index": 0, "delta": delta, "finish_reason": None}]}
+                self.wfile.write(f"data: {json.dumps(event)}\n\n".encode("utf-8"))
+                self.wfile.flush()
+                time.sleep(self.server.config["chunk_ms"] / 1000)
+            done = {**base, "choices": [{"index": 0, "delta": {}, "finish_reason": "stop"}]}
+            self.wfile.write(f"data: {json.dumps(done)}\n\n".encode("utf-8"))
+            if (request.get("stream_options") or {}).get("include_usage"):
+                usage = {**base, "choices": [], "usage": {
+                    "prompt_tokens": len(prompt.split()),
+                    "completion_tokens": len(words),
+                    "total_tokens": len(prompt.split()) + len(words),
+                }}
+                self.wfile.write(f"data: {json.dumps(usage)}\n\n".encode("utf-8"))
+            self.wfile.write(b"data: [DONE]\n\n")
+        except (BrokenPipeError, ConnectionResetError):
+            # The client closed the stream early
+            self.server.stats["aborted_streams"] += 1
+
+    def _simulate(self) -> bool:
+        """Sleep for the configured latency; return False if an error was sent instead."""
+        config = self.server.config
+        latency = max(0.0, random.gauss(config["latency_ms"], config["jitter_ms"])) / 1000
+        time.sleep(latency)
+        roll = random.random()
+        if roll < config["rate_limit_rate"]:
+            self._send_json(429, {"error": {"message": "Rate limit reached", "type": "rate_limit_error"}},
+                            headers={"retry-after-ms": "50"})
+            return False
+        if roll < config["rate_limit_rate"] + config["error_rate"]:
+            self._send_json(500, {"error": {"message": "Mock server error", "type": "server_error"}})
+            return False
+        return True
+
+    def do_POST(self):
+        length = int(self.headers.get("Content-Length", 0))
+        request = json.loads(self.rfile.read(length) or b"{}")
+        self.server.stats["requests"] += 1
+
+        if not self._simulate():
+            self.server.stats["errors"] += 1
+            return
+
+        if self.path.endswith("/chat/completions"):
+            prompt = request["messages"][-1]["content"]
+            content = fake_completion(prompt)
+            if request.get("stream"):
+                self._send_stream(request, content, prompt)
+                return
+            self._send_json(200, {
+                "id": "chatcmpl-mock",
+                "object": "chat.completion",
+                "created": int(time.time()),
+                "model": request.get("model", "gpt-4o"),
+                "choices": [{
+                    "index": 0,
+                    "message": {"role": "assistant", "content": content},
+                    "finish_reason": "stop",
+                }],
+                "usage": {
+                    "prompt_tokens": len(prompt.split()),
+                    "completion_tokens": len(content.split()),
+                    "total_tokens": len(prompt.split()) + len(content.split()),
+                },
+            })
+        elif self.path.endswith("/embeddings"):
+            inputs = request["input"]
+            if isinstance(inputs, str) or (inputs and isinstance(inputs[0], int)):
+                inputs = [inputs]
+            data = [
+                {"object": "embedding", "index": i, "embedding": fake_embedding(str(text))}
+                for i, text in enumerate(inputs)
+            ]
+            self._send_json(200, {
+                "object": "list",
+                "data": data,
+                "model": request.get("model", "text-embedding-ada-002"),
+                "usage": {"prompt_tokens": 0, "total_tokens": 0},
+            })
+        else:
+            self._send_json(404, {"error": {"message": f"Unknown path {self.path}"}})
+
+
+def start_mock_server(host="127.0.0.1", port=0, latency_ms=50.0, jitter_ms=10.0,
+                      error_rate=0.0, rate_limit_rate=0.0, chunk_ms=5.0):
+    """
+    Start the mock OpenAI-compatible server in a background thread.
+    Returns (server, base_url); call server.shutdown() when done.
+    """
+    server = ThreadingHTTPServer((host, port), MockOpenAIHandler)
+    server.daemon_threads = True
+    server.config = {
+        "latency_ms": latency_ms,
+        "jitter_ms": jitter_ms,
+        "error_rate": error_rate,
+        "rate_limit_rate": rate_limit_rate,
+        "chunk_ms": chunk_ms,
+    }
+    server.stats = {"requests": 0, "errors": 0, "aborted_streams": 0}
+    threading.Thread(target=server.serve_forever, daemon=True).start()
+    return server, f"http://{host}:{server.server_address[1]}/v1"
+
+
+if __name__ == "__main__":
+    port = int(sys.argv[1]) if len(sys.argv) > 1 else 8900
+    server, base_url = start_mock_server(port=port)
+    print(f"🧪 Mock OpenAI server listening on {base_url} (Ctrl+C to stop)")
+    try:
+        while True:
+            time.sleep(3600)
+    except KeyboardInterrupt:
+        server.shutdown()
@@ -0,0 +1,152 @@
+import hashlib
+import json
+import os
+from dataclasses import dataclass, field
+from typing import Dict, Iterator, Optional
+
+# ✅ Supported corpus formats, by file extension
+TEXT_EXTENSIONS = (".txt",)
+JSONL_EXTENSIONS = (".jsonl", ".ndjson")
+PARQUET_EXTENSIONS = (".parquet",)
+
+
+@dataclass
+class PromptRecord:
+    category: str
+    prompt: str
+    metadata: Dict = field(default_factory=dict)
+
+
+def prompt_hash(prompt: str) -> bytes:
+    """Stable 8-byte digest used for both deduplication and sharding."""
+    return hashlib.blake2b(prompt.encode("utf-8"), digest_size=8).digest()
+
+
+def _read_text(path: str, category: str) -> Iterator[PromptRecord]:
+    with open(path, "r", encoding="utf-8") as f:
+        for line in f:
+            line = line.strip()
+            if line:
+                yield PromptRecord(category, line)
+
+
+def _read_jsonl(path: str, category: str) -> Iterator[PromptRecord]:
+    """Each line: {"prompt": ..., "category": optional, ...any other fields become metadata}."""
+    with open(path, "r", encoding="utf-8") as f:
+        for line_number, line in enumerate(f, 1):
+            if not line.strip():
+                continue
+            record = json.loads(line)
+            prompt = (record.pop("prompt", "") or "").strip()
+            if not prompt:
+                print(f"⚠️ Skipping {path}:{line_number}, no prompt")
+                continue
+            yield PromptRecord(record.pop("category", None) or category, prompt, record)
+
+
+def _read_parquet(path: str, category: str, batch_size: int = 10_000) -> Iterator[PromptRecord]:
+    """Reads record batches lazily; needs pyarrow, which isn't a project dependency."""
+    try:
+        import pyarrow.parquet as pq
+    except ImportError as e:
+        raise ImportError(
+            f"Reading {path} needs pyarrow, which is not installed. "
+            "Install it (pip install pyarrow) or convert the prompts to .jsonl."
+        ) from e
+
+    parquet = pq.ParquetFile(path)
+    for batch in parquet.iter_batches(batch_size=batch_size):
+        for record in batch.to_pylist():
+            prompt = (record.pop("prompt", "") or "").strip()
+            if prompt:
+                yield PromptRecord(record.pop("category", None) or category, prompt, record)
+
+
+def read_prompt_file(path: str, category: str) -> Iterator[PromptRecord]:
+    extension = os.path.splitext(path)[1].lower()
+    if extension in JSONL_EXTENSIONS:
+        return _read_jsonl(path, category)
+    if extension in PARQUET_EXTENSIONS:
+        return _read_parquet(path, category)
+    return _read_text(path, category)
+
+
+def discover_categories(directory: str) -> Dict[str, str]:
+    """Treat every prompt file in a directory as a category named after the file."""
+    extensions = TEXT_EXTENSIONS + JSONL_EXTENSIONS + PARQUET_EXTENSIONS
+    return {
+        os.path.splitext(name)[0]: os.path.join(directory, name)
+        for name in sorted(os.listdir(directory))
+        if name.lower().endswith(extensions)
+    }
+
+
+def parse_sources(specs) -> Dict[str, str]:
+    """
+    CLI specs to a {category: path} mapping. `category=path` names a file;
+    a bare directory contributes every prompt file in it.
+    """
+    sources = {}
+    for spec in specs or []:
+        if "=" in spec:
+            category, _, path = spec.partition("=")
+            sources[category.strip()] = path.strip()
+        elif os.path.isdir(spec):
+            sources.update(discover_categories(spec))
+        else:
+            sources[os.path.splitext(os.path.basename(spec))[0]] = spec
+    return sources
+
+
+class PromptSource:
+    """
+    Streams prompts from text, JSONL or Parquet files without loading them
+    into memory. Prompts are deduplicated by hash and can be split into
+    `num_shards` deterministic shards: a prompt always lands in the same shard,
+    so separate runner processes can split one corpus without coordinating.
+    """
+
+    def __init__(self, categories: Dict[str, str], shard_index: int = 0, num_shards: int = 1,
+                 dedup: bool = True):
+        if not 0 <= shard_index < num_shards:
+            raise ValueError(f"Shard index {shard_index} is out of range for {num_shards} shards")
+        self.categories = dict(categories)
+        self.shard_index = shard_index
+        self.num_shards = num_shards
+        self.dedup = dedup
+        self.duplicates = 0
+
+    def _in_shard(self, digest: bytes) -> bool:
+        return self.num_shards == 1 or int.from_bytes(digest, "big") % self.num_shards == self.shard_index
+
+    def __iter__(self) -> Iterator[PromptRecord]:
+        seen = {}
+        self.duplicates = 0
+        for category, path in self.categories.items():
+            if not os.path.exists(path):
+                print(f"⚠️ Missing file: {path}")
+                continue
+            for record in read_prompt_file(path, category):
+                digest = prompt_hash(record.prompt)
+                if not self._in_shard(digest):
+                    continue
+                if self.dedup:
+                    # Dedup is per (category, prompt) so one prompt can appear in several suites;
+                    # digests are kept as ints in one set per category (~80 bytes per prompt)
+                    key = int.from_bytes(digest, "big")
+                    category_seen = seen.setdefault(record.category, set())
+                    if key in category_seen:
+                        self.duplicates += 1
+                        continue
+                    category_seen.add(key)
+                yield record
+
+
+def parse_shard(spec: Optional[str]):
+    """Parse `i/n` (zero-based shard i of n) into a tuple."""
+    if not spec:
+        return 0, 1
+    index, _, total = spec.partition("/")
+    if not index.isdigit() or not total.isdigit():
+        raise ValueError(f"Invalid shard '{spec}', expected I/N such as 0/4")
+    return int(index), int(total)
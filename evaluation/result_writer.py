@@ -0,0 +1,105 @@
+import csv
+import os
+
+from evaluation.tracing import TIMING_FIELDS
+
+# Filled in for hosted models when the runner streams responses
+STREAM_FIELDS = ["ttft_ms", "detection_ms", "aborted"]
+
+# ✅ Column order of every results CSV; timing and stream columns stay empty unless enabled
+RESULT_FIELDS = [
+    "timestamp", "model", "category", "prompt", "response", "risk_score", "severity", "findings",
+    *TIMING_FIELDS, *STREAM_FIELDS,
+]
+
+
+def _trim_partial_line(path):
+    """Drop a half-written final row left behind by a crash."""
+    with open(path, "rb+") as f:
+        f.seek(0, os.SEEK_END)
+        size = f.tell()
+        if size == 0:
+            return
+        f.seek(size - 1)
+        if f.read(1) == b"\n":
+            return
+        # Walk back to the last complete line
+        position = size - 1
+        while position > 0:
+            step = min(4096, position)
+            position -= step
+            f.seek(position)
+            block = f.read(step)
+            newline = block.rfind(b"\n")
+            if newline != -1:
+                f.truncate(position + newline + 1)
+                return
+        f.truncate(0)
+
+
+def load_completed(path):
+    """Return the (model, category, prompt) triples already present in a results file."""
+    completed = set()
+    if not os.path.exists(path):
+        return completed
+    with open(path, "r", newline="", encoding="utf-8") as f:
+        for row in csv.DictReader(f):
+            if row.get("model") is not None and row.get("prompt") is not None:
+                completed.add((row["model"], row["category"], row["prompt"]))
+    return completed
+
+
+class ResultWriter:
+    """
+    Streams result rows to a CSV as they are produced, flushing to disk every
+    `flush_every` rows. With `resume=True` an existing file is appended to
+    instead of overwritten, so an interrupted run can pick up where it stopped.
+    """
+
+    def __init__(self, path, fieldnames=None, flush_every=20, resume=False):
+        self.path = path
+        self.fieldnames = list(fieldnames or RESULT_FIELDS)
+        self.flush_every = max(1, flush_every)
+        self.resume = resume
+        self.rows_written = 0
+        self._file = None
+        self._writer = None
+
+    def open(self):
+        os.makedirs(os.path.dirname(self.path) or ".", exist_ok=True)
+        appending = self.resume and os.path.exists(self.path)
+        if appending:
+            _trim_partial_line(self.path)
+            appending = os.path.getsize(self.path) > 0
+        if appending:
+            # Keep the columns of the file being resumed, even if they predate new fields
+            with open(self.path, "r", newline="", encoding="utf-8") as f:
+                self.fieldnames = next(csv.reader(f))
+        self._file = open(self.path, "a" if appending else "w", newline="", encoding="utf-8")
+        self._writer = csv.DictWriter(self._file, fieldnames=self.fieldnames, extrasaction="ignore")
+        if not appending:
+            self._writer.writeheader()
+            self.flush()
+        return self
+
+    def write(self, row):
+        self._writer.writerow(row)
+        self.rows_written += 1
+        if self.rows_written % self.flush_every == 0:
+            self.flush()
+
+    def flush(self):
+        self._file.flush()
+        os.fsync(self._file.fileno())
+
+    def close(self):
+        if self._file is not None:
+            self.flush()
+            self._file.close()
+            self._file = None
+
+    def __enter__(self):
+        return self.open()
+
+    def __exit__(self, *exc):
+        self.close()
@@ -0,0 +1,155 @@
+import asyncio
+import random
+import time
+from collections import deque
+from concurrent.futures import ThreadPoolExecutor
+
+from evaluation.tracing import count
+
+# ✅ Default number of in-flight requests per model
+DEFAULT_CONCURRENCY = 4
+
+# Wrappers turn exceptions into strings, so rate limits are detected on the text
+ERROR_PREFIXES = ("[OpenAI Error]", "[Local Agent Error]")
+RATE_LIMIT_MARKERS = ("429", "rate limit", "rate_limit", "too many requests")
+
+
+def is_rate_limited(response) -> bool:
+    """Return True if a wrapper error string reports a rate limit."""
+    if not isinstance(response, str) or not response.startswith(ERROR_PREFIXES):
+        return False
+    lowered = response.lower()
+    return any(marker in lowered for marker in RATE_LIMIT_MARKERS)
+
+
+def query_with_backoff(model, prompt, max_retries=5, base_delay=1.0, max_delay=30.0):
+    """
+    Query a model, retrying with exponential backoff and full jitter
+    while the response reports a rate limit. Wrappers that set
+    `handles_retries` already back off internally and are queried once.
+    """
+    if getattr(model, "handles_retries", False):
+        return model.query(prompt)
+    for attempt in range(max_retries + 1):
+        response = model.query(prompt)
+        if attempt == max_retries or not is_rate_limited(response):
+            return response
+        count("retries")
+        delay = min(max_delay, base_delay * (2 ** attempt))
+        time.sleep(random.uniform(0, delay))
+    return response
+
+
+async def aquery_with_backoff(model, prompt, max_retries=5, base_delay=1.0, max_delay=30.0):
+    """Async counterpart of query_with_backoff, for wrappers with `aquery`."""
+    if getattr(model, "handles_retries", False):
+        return await model.aquery(prompt)
+    for attempt in range(max_retries + 1):
+        response = await model.aquery(prompt)
+        if attempt == max_retries or not is_rate_limited(response):
+            return response
+        count("retries")
+        delay = min(max_delay, base_delay * (2 ** attempt))
+        await asyncio.sleep(random.uniform(0, delay))
+    return response
+
+
+class ConcurrentScheduler:
+    """
+    Runs jobs on one bounded thread pool per model, so every model works
+    side by side while never exceeding its own number of in-flight requests.
+    Results are yielded in the order the jobs were submitted.
+    """
+
+    def __init__(self, concurrency=None, default_concurrency=DEFAULT_CONCURRENCY):
+        self.concurrency = dict(concurrency or {})
+        self.default_concurrency = default_concurrency
+
+    def limit_for(self, model_name) -> int:
+        return max(1, int(self.concurrency.get(model_name, self.default_concurrency)))
+
+    def run(self, jobs, handler, max_pending=256):
+        """
+        Submit every `(model_name, *args)` job and yield `handler(model_name, *args)`
+        results in submission order. At most `max_pending` jobs are held in
+        memory at once, so arbitrarily long job streams run in bounded memory.
+        """
+        executors = {}
+        pending = deque()
+        try:
+            for job in jobs:
+                model_name = job[0]
+                if model_name not in executors:
+                    executors[model_name] = ThreadPoolExecutor(
+                        max_workers=self.limit_for(model_name),
+                        thread_name_prefix=f"eval-{model_name}",
+                    )
+                pending.append(executors[model_name].submit(handler, *job))
+                if len(pending) >= max_pending:
+                    yield pending.popleft().result()
+
+            while pending:
+                yield pending.popleft().result()
+        finally:
+            for executor in executors.values():
+                executor.shutdown(wait=True, cancel_futures=True)
+
+
+class AsyncScheduler:
+    """
+    Runs jobs as coroutines on a single event loop, with one semaphore per
+    model capping its in-flight requests. Like ConcurrentScheduler, results
+    are yielded in submission order from a bounded window of pending jobs.
+    """
+
+    def __init__(self, concurrency=None, default_concurrency=DEFAULT_CONCURRENCY):
+        self.concurrency = dict(concurrency or {})
+        self.default_concurrency = default_concurrency
+
+    def limit_for(self, model_name) -> int:
+        return max(1, int(self.concurrency.get(model_name, self.default_concurrency)))
+
+    def run(self, jobs, handler, max_pending=256, cleanup=None):
+        """
+        Yield `await handler(model_name, *args)` for every job in submission order.
+        The loop only advances while the caller waits for the next result;
+        `cleanup` is an optional coroutine function awaited before the loop closes.
+        """
+        loop = asyncio.new_event_loop()
+        semaphores = {}
+        pending = deque()
+
+        async def limited(job):
+            async with semaphores[job[0]]:
+                return await handler(*job)
+
+        try:
+            for job in jobs:
+                if job[0] not in semaphores:
+                    semaphores[job[0]] = asyncio.Semaphore(self.limit_for(job[0]))
+                pending.append(loop.create_task(limited(job)))
+                if len(pending) >= max_pending:
+                    yield loop.run_until_complete(pending.popleft())
+
+            while pending:
+                yield loop.run_until_complete(pending.popleft())
+        finally:
+            for task in pending:
+                task.cancel()
+            if pending:
+                loop.run_until_complete(asyncio.gather(*pending, return_exceptions=True))
+            if cleanup is not None:
+                loop.run_until_complete(cleanup())
+            loop.run_until_complete(loop.shutdown_default_executor())
+            loop.close()
+
+
+def parse_concurrency(specs):
+    """Parse CLI values like `openai=8` into a {model: limit} mapping."""
+    limits = {}
+    for spec in specs or []:
+        name, _, value = spec.partition("=")
+        if not name or not value.isdigit():
+            raise ValueError(f"Invalid concurrency spec '{spec}', expected MODEL=N")
+        limits[name.strip()] = int(value)
+    return limits
@@ -0,0 +1,450 @@
+import sys
+import os
+sys.path.append(os.path.abspath(os.path.join(os.path.dirname(__file__), "..")))
+import argparse
+import http.client
+import json
+import queue
+import socket
+import socketserver
+import threading
+import time
+import uuid
+from collections import deque
+from concurrent.futures import Future, ThreadPoolExecutor, as_completed
+from http.server import BaseHTTPRequestHandler, ThreadingHTTPServer
+from typing import Dict, Iterator, List, Optional
+
+import tests.privacy_test_runner as runner
+
+DEFAULT_HOST = "127.0.0.1"
+DEFAULT_PORT = 8765
+DEFAULT_CATEGORY = "adhoc"
+# Latency percentiles are computed over this many recent prompts per backend
+LATENCY_WINDOW = 2048
+
+
+def percentile(sorted_values, pct):
+    if not sorted_values:
+        return None
+    index = min(len(sorted_values) - 1, max(0, round(pct / 100 * (len(sorted_values) - 1))))
+    return round(sorted_values[index], 3)
+
+
+class MicroBatcher:
+    """
+    Groups prompts for one backend into batches of up to `max_batch`, waiting
+    at most `max_wait_ms` after the first prompt for more to arrive. At most
+    `workers` batches run at once; while they do, new prompts queue up and
+    form the next, fuller batch.
+    """
+
+    def __init__(self, name: str, handler, max_batch: int = 16, max_wait_ms: float = 10.0, workers: int = 2):
+        self.name = name
+        self.handler = handler
+        self.max_batch = max(1, max_batch)
+        self.max_wait = max_wait_ms / 1000
+        self.workers = max(1, workers)
+        self.queue = queue.Queue()
+        self.in_flight = 0
+        self.batches = 0
+        self.batched_items = 0
+        self.latencies = deque(maxlen=LATENCY_WINDOW)
+        self._slots = threading.Semaphore(self.workers)
+        self._executor = ThreadPoolExecutor(max_workers=self.workers, thread_name_prefix=f"batch-{name}")
+        self._lock = threading.Lock()
+        self._thread = threading.Thread(target=self._loop, name=f"batcher-{name}", daemon=True)
+        self._thread.start()
+
+    def submit(self, item) -> Future:
+        future = Future()
+        self.queue.put((item, future, time.perf_counter()))
+        return future
+
+    def _loop(self):
+        while True:
+            self._slots.acquire()
+            first = self.queue.get()
+            if first is None:
+                break
+            batch = [first]
+            deadline = time.monotonic() + self.max_wait
+            stopping = False
+            while len(batch) < self.max_batch:
+                timeout = deadline - time.monotonic()
+                if timeout <= 0:
+                    break
+                try:
+                    entry = self.queue.get(timeout=timeout)
+                except queue.Empty:
+                    break
+                if entry is None:
+                    stopping = True
+                    break
+                batch.append(entry)
+            with self._lock:
+                self.in_flight += len(batch)
+                self.batches += 1
+                self.batched_items += len(batch)
+            self._executor.submit(self._run, batch)
+            if stopping:
+                break
+
+    def _run(self, batch):
+        try:
+            results = self.handler([item for item, _, _ in batch])
+        except Exception as e:
+            results = e
+        now = time.perf_counter()
+        with self._lock:
+            self.in_flight -= len(batch)
+            self.latencies.extend((now - queued) * 1000 for _, _, queued in batch)
+        self._slots.release()
+        for index, (_, future, _) in enumerate(batch):
+            if isinstance(results, Exception):
+                future.set_exception(results)
+            else:
+                future.set_result(results[index])
+
+    def stats(self) -> dict:
+        with self._lock:
+            latencies = sorted(self.latencies)
+            return {
+                "queue_depth": self.queue.qsize(),
+                "in_flight": self.in_flight,
+                "batches": self.batches,
+                "avg_batch_size": round(self.batched_items / self.batches, 2) if self.batches else 0.0,
+                "p50_ms": percentile(latencies, 50),
+                "p95_ms": percentile(latencies, 95),
+                "p99_ms": percentile(latencies, 99),
+            }
+
+    def close(self):
+        self.queue.put(None)
+        self._thread.join(timeout=5)
+        self._executor.shutdown(wait=True)
+
+
+def evaluate_batch(model_name: str, model, jobs: List[tuple]) -> List[dict]:
+    """Score a micro-batch of (category, prompt) jobs with one `query_batch` call."""
+    prompts = [prompt for _, prompt in jobs]
+    try:
+        responses = model.query_batch(prompts)
+    except Exception:
+        # One failing prompt (e.g. a replay miss) shouldn't turn the whole batch into errors
+        return [runner.evaluate_prompt(model_name, model, category, prompt) for category, prompt in jobs]
+    return [
+        runner.result_row(model_name, category, prompt, response)
+        for (category, prompt), response in zip(jobs, responses)
+    ]
+
+
+class EvaluationService:
+    """
+    Keeps model backends (and the retriever) warm in one process and
+    evaluates jobs through a micro-batcher per backend, so many small jobs
+    share warm clients, agent workers and vector store handles.
+    """
+
+    def __init__(self, models=None, max_batch: int = 16, max_wait_ms: float = 10.0, batch_workers: int = 2):
+        self.models = runner.MODELS
+        self.model_names = list(models or self.models)
+        self.batchers: Dict[str, MicroBatcher] = {}
+        self.max_batch = max_batch
+        self.max_wait_ms = max_wait_ms
+        self.batch_workers = batch_workers
+        self.started_at = time.time()
+        self.jobs_total = 0
+        self.jobs_active = 0
+        self.prompts_total = 0
+        self._lock = threading.Lock()
+
+    def warm(self, retriever: bool = True):
+        """Build every backend up front so the first job doesn't pay the cold start."""
+        in_process_agent = False
+        for name in self.model_names:
+            model = self.models[name]
+            if name == "openai":
+                from models.openai_wrapper import get_client
+                get_client()
+            elif getattr(model, "pool", None) is not None:
+                # Pool workers load their own agent and retriever when they start
+                model.pool.start()
+            elif name == "local":
+                in_process_agent = True
+            print(f"🔥 {name} backend ready")
+        if retriever and in_process_agent:
+            try:
+                from agents.local_llm_agent import get_local_agent
+                from retrievers.chroma_manager import get_service
+                get_local_agent()
+                get_service().open()
+                print("🔥 Local agent and retriever ready")
+            except Exception as e:
+                print(f"⚠️ Retriever warm-up failed, it will load on first use: {e}")
+
+    def _batcher(self, name: str) -> MicroBatcher:
+        with self._lock:
+            if name not in self.batchers:
+                model = self.models[name]
+                self.batchers[name] = MicroBatcher(
+                    name, lambda jobs, name=name, model=model: evaluate_batch(name, model, jobs),
+                    max_batch=self.max_batch, max_wait_ms=self.max_wait_ms, workers=self.batch_workers,
+                )
+            return self.batchers[name]
+
+    def run_job(self, prompts: List[dict], models: Optional[List[str]] = None) -> Iterator[dict]:
+        """Submit every (model, prompt) pair and yield result rows as they complete."""
+        names = models or self.model_names
+        unknown = [name for name in names if name not in self.models]
+        if unknown:
+            raise ValueError(f"Unknown models: {', '.join(unknown)}")
+        with self._lock:
+            self.jobs_total += 1
+            self.jobs_active += 1
+            self.prompts_total += len(prompts) * len(names)
+        try:
+            futures = {}
+            for index, record in enumerate(prompts):
+                for name in names:
+                    future = self._batcher(name).submit((record["category"], record["prompt"]))
+                    futures[future] = index
+            for future in as_completed(futures):
+                yield {"index": futures[future], **future.result()}
+        finally:
+            with self._lock:
+                self.jobs_active -= 1
+
+    def metrics(self) -> dict:
+        with self._lock:
+            summary = {
+                "uptime_s": round(time.time() - self.started_at, 1),
+                "jobs_total": self.jobs_total,
+                "jobs_active": self.jobs_active,
+                "prompts_total": self.prompts_total,
+            }
+            batchers = dict(self.batchers)
+        summary["backends"] = {name: batcher.stats() for name, batcher in batchers.items()}
+        summary["queue_depth"] = sum(b["queue_depth"] for b in summary["backends"].values())
+        return summary
+
+    def close(self):
+        for batcher in list(self.batchers.values()):
+            batcher.close()
+        self.models.close_all()
+
+
+def parse_job(body: dict) -> List[dict]:
+    """
+    Accept {"prompts": ["...", {"prompt": ..., "category": ...}], "category": default, "models": [...]}.
+    Anything else raises ValueError, which the handler turns into a 400.
+    """
+    if not isinstance(body, dict):
+        raise ValueError("Job must be a JSON object")
+    entries = body.get("prompts") or []
+    if not isinstance(entries, list):
+        raise ValueError("'prompts' must be a list")
+    models = body.get("models")
+    if models is not None and not (isinstance(models, list) and all(isinstance(m, str) for m in models)):
+        raise ValueError("'models' must be a list of model names")
+    default_category = body.get("category") or DEFAULT_CATEGORY
+    prompts = []
+    for entry in entries:
+        if isinstance(entry, str):
+            entry = {"prompt": entry}
+        if not isinstance(entry, dict) or not isinstance(entry.get("prompt") or "", str):
+            raise ValueError(f"Invalid prompt entry: {entry!r}")
+        prompt = (entry.get("prompt") or "").strip()
+        if prompt:
+            prompts.append({"prompt": prompt, "category": str(entry.get("category") or default_category)})
+    if not prompts:
+        raise ValueError("Job has no prompts")
+    return prompts
+
+
+class ServiceHandler(BaseHTTPRequestHandler):
+    server_version = "PrivacyEval/1.0"
+    protocol_version = "HTTP/1.1"
+
+    def log_message(self, format, *args):
+        pass
+
+    def _send_json(self, status: int, payload: dict):
+        body = json.dumps(payload, default=str).encode("utf-8")
+        self.send_response(status)
+        self.send_header("Content-Type", "application/json")
+        self.send_header("Content-Length", str(len(body)))
+        self.end_headers()
+        self.wfile.write(body)
+
+    def _write_chunk(self, payload: dict):
+        line = (json.dumps(payload, default=str) + "\n").encode("utf-8")
+        self.wfile.write(f"{len(line):x}\r\n".encode("ascii") + line + b"\r\n")
+        self.wfile.flush()
+
+    def do_GET(self):
+        service = self.server.service
+        if self.path == "/metrics":
+            self._send_json(200, service.metrics())
+        elif self.path == "/health":
+            self._send_json(200, {"status": "ok", "models": service.model_names})
+        else:
+            self._send_json(404, {"error": f"Unknown path {self.path}"})
+
+    def do_POST(self):
+        if self.path != "/jobs":
+            self._send_json(404, {"error": f"Unknown path {self.path}"})
+            return
+        start = time.perf_counter()
+        try:
+            length = int(self.headers.get("Content-Length", 0))
+            body = json.loads(self.rfile.read(length) or b"{}")
+            prompts = parse_job(body)
+            rows = self.server.service.run_job(prompts, body.get("models"))
+            first = next(rows, None)
+        except (ValueError, KeyError) as e:
+            self._send_json(400, {"error": str(e)})
+            return
+        except Exception as e:
+            self._send_json(500, {"error": f"{type(e).__name__}: {e}"})
+            return
+
+        # ✅ Rows are streamed back as NDJSON while the rest of the job is still running
+        job_id = uuid.uuid4().hex[:12]
+        self.send_response(200)
+        self.send_header("Content-Type", "application/x-ndjson")
+        self.send_header("Transfer-Encoding", "chunked")
+        self.end_headers()
+        count = 0
+        error = None
+        try:
+            if first is not None:
+                self._write_chunk({"job_id": job_id, **first})
+                count += 1
+            try:
+                for row in rows:
+                    self._write_chunk({"job_id": job_id, **row})
+                    count += 1
+            except (BrokenPipeError, ConnectionResetError):
+                raise
+            except Exception as e:
+                # Headers are already sent, so a failed job still ends with a summary and the final chunk
+                error = f"{type(e).__name__}: {e}"
+            summary = {"job_id": job_id, "done": True, "rows": count,
+                       "elapsed_ms": round((time.perf_counter() - start) * 1000, 3)}
+            if error:
+                summary["error"] = error
+            self._write_chunk(summary)
+            self.wfile.write(b"0\r\n\r\n")
+        except (BrokenPipeError, ConnectionResetError):
+            # The caller went away; remaining results are dropped when their batches finish
+            self.close_connection = True
+
+
+class UnixHTTPServer(ThreadingHTTPServer):
+    address_family = socket.AF_UNIX
+
+    def server_bind(self):
+        socketserver.TCPServer.server_bind(self)
+        self.server_name = "localhost"
+        self.server_port = 0
+
+
+def start_service(service: EvaluationService, host: str = DEFAULT_HOST, port: int = DEFAULT_PORT,
+                  socket_path: Optional[str] = None):
+    """Serve in a background thread; returns (server, address). Call server.shutdown() to stop."""
+    if socket_path:
+        if os.path.exists(socket_path):
+            os.unlink(socket_path)
+        server = UnixHTTPServer(socket_path, ServiceHandler)
+        address = f"unix:{socket_path}"
+    else:
+        server = ThreadingHTTPServer((host, port), ServiceHandler)
+        address = f"http://{host}:{server.server_address[1]}"
+    server.daemon_threads = True
+    server.service = service
+    threading.Thread(target=server.serve_forever, daemon=True).start()
+    return server, address
+
+
+# ✅ Client helpers: address is "http://host:port" or "unix:/path/to/socket"
+class _UnixConnection(http.client.HTTPConnection):
+    def __init__(self, path: str, timeout: Optional[float] = None):
+        super().__init__("localhost", timeout=timeout)
+        self.socket_path = path
+
+    def connect(self):
+        self.sock = socket.socket(socket.AF_UNIX, socket.SOCK_STREAM)
+        self.sock.settimeout(self.timeout)
+        self.sock.connect(self.socket_path)
+
+
+def _connect(address: str, timeout: Optional[float] = None) -> http.client.HTTPConnection:
+    if address.startswith("unix:"):
+        return _UnixConnection(address[len("unix:"):], timeout=timeout)
+    host_port = address.split("://", 1)[-1].rstrip("/")
+    return http.client.HTTPConnection(host_port, timeout=timeout)
+
+
+def submit_job(prompts, address: str = f"http://{DEFAULT_HOST}:{DEFAULT_PORT}", models=None,
+               category: Optional[str] = None, timeout: Optional[float] = None) -> Iterator[dict]:
+    """Send a job and yield each NDJSON line (result rows, then a final `done` summary)."""
+    body = json.dumps({"prompts": list(prompts), "models": models, "category": category})
+    conn = _connect(address, timeout)
+    try:
+        conn.request("POST", "/jobs", body=body, headers={"Content-Type": "application/json"})
+        response = conn.getresponse()
+        if response.status != 200:
+            raise RuntimeError(f"Job rejected ({response.status}): {response.read().decode('utf-8')}")
+        for line in response:
+            if line.strip():
+                yield json.loads(line)
+    finally:
+        conn.close()
+
+
+def fetch_metrics(address: str = f"http://{DEFAULT_HOST}:{DEFAULT_PORT}") -> dict:
+    conn = _connect(address, timeout=10)
+    try:
+        conn.request("GET", "/metrics")
+        return json.loads(conn.getresponse().read())
+    finally:
+        conn.close()
+
+
+def parse_args():
+    parser = argparse.ArgumentParser(description="Keep model backends warm and evaluate prompts over a local API.")
+    parser.add_argument("--host", default=DEFAULT_HOST)
+    parser.add_argument("--port", type=int, default=DEFAULT_PORT)
+    parser.add_argument("--socket", metavar="PATH", help="Listen on a Unix socket instead of TCP.")
+    parser.add_argument("--models", nargs="*", default=None, choices=list(runner.MODELS),
+                        help="Backends to serve (default: all).")
+    parser.add_argument("--max-batch", type=int, default=16, help="Largest micro-batch per backend.")
+    parser.add_argument("--max-wait-ms", type=float, default=10.0,
+                        help="How long a micro-batch waits for more prompts after the first.")
+    parser.add_argument("--batch-workers", type=int, default=2,
+                        help="Micro-batches each backend runs at the same time.")
+    parser.add_argument("--no-warm", action="store_true", help="Build backends on first use instead of at startup.")
+    runner.add_backend_arguments(parser)
+    return parser.parse_args()
+
+
+if __name__ == "__main__":
+    args = parse_args()
+    runner.configure_models(args)
+    service = EvaluationService(args.models, max_batch=args.max_batch, max_wait_ms=args.max_wait_ms,
+                                batch_workers=args.batch_workers)
+    if not args.no_warm:
+        service.warm()
+    server, address = start_service(service, args.host, args.port, args.socket)
+    print(f"🛰️ Evaluation service listening on {address} (POST /jobs, GET /metrics; Ctrl+C to stop)")
+    try:
+        while True:
+            time.sleep(3600)
+    except KeyboardInterrupt:
+        pass
+    finally:
+        server.shutdown()
+        service.close()
+        if args.socket and os.path.exists(args.socket):
+            os.unlink(args.socket)
@@ -0,0 +1,260 @@
+import json
+import os
+import threading
+import time
+from contextvars import ContextVar
+from typing import Optional
+
+# ✅ Off unless PRIVACY_TRACE=1 or enable_tracing() is called
+_enabled = os.getenv("PRIVACY_TRACE", "").lower() in ("1", "true", "yes")
+_exporter = None
+
+_current_trace: ContextVar[Optional["Trace"]] = ContextVar("current_trace", default=None)
+_current_span: ContextVar[Optional["Span"]] = ContextVar("current_span", default=None)
+
+# Span-name prefixes that make up the per-prompt timing columns
+TIMING_GROUPS = {
+    "llm_ms": ("llm.",),
+    "tool_ms": ("tool.",),
+    "retrieval_ms": ("retriever.",),
+    "hosted_ms": ("openai.",),
+}
+TIMING_FIELDS = ["latency_ms", *TIMING_GROUPS, "agent_overhead_ms", "tokens", "retries"]
+
+
+def enable_tracing(exporter=None):
+    global _enabled, _exporter
+    _enabled = True
+    if exporter is not None:
+        _exporter = exporter
+
+
+def disable_tracing():
+    global _enabled, _exporter
+    _enabled = False
+    if _exporter is not None:
+        _exporter.close()
+    _exporter = None
+
+
+def is_enabled() -> bool:
+    return _enabled
+
+
+class Span:
+    __slots__ = ("name", "attrs", "start", "end", "parent", "thread_id", "_trace", "_tokens")
+
+    def __init__(self, trace, name, attrs):
+        self._trace = trace
+        self.name = name
+        self.attrs = attrs
+        self.parent = None
+        self.start = self.end = None
+        self.thread_id = threading.get_ident()
+
+    @property
+    def duration_ms(self) -> float:
+        return ((self.end or time.perf_counter()) - self.start) * 1000
+
+    def set(self, **attrs):
+        self.attrs.update(attrs)
+
+    def add(self, key, amount=1):
+        self.attrs[key] = self.attrs.get(key, 0) + amount
+
+    def __enter__(self):
+        self.parent = _current_span.get()
+        self._tokens = _current_span.set(self)
+        self.start = time.perf_counter()
+        return self
+
+    def __exit__(self, exc_type, exc, tb):
+        self.end = time.perf_counter()
+        _current_span.reset(self._tokens)
+        if exc_type is not None:
+            self.attrs["error"] = exc_type.__name__
+        self._trace.record(self)
+        return False
+
+
+class _NoopSpan:
+    """Returned when tracing is off; every operation is a no-op."""
+    __slots__ = ()
+
+    def set(self, **attrs):
+        pass
+
+    def add(self, key, amount=1):
+        pass
+
+    def __enter__(self):
+        return self
+
+    def __exit__(self, *exc):
+        return False
+
+
+NOOP_SPAN = _NoopSpan()
+
+
+class Trace:
+    """All spans recorded while handling one prompt."""
+
+    def __init__(self, **attrs):
+        self.attrs = attrs
+        self.spans = []
+        self.counters = {}
+        self.start = self.end = None
+        self.wall_start = time.time()
+        self._lock = threading.Lock()
+
+    def record(self, span):
+        with self._lock:
+            self.spans.append(span)
+
+    def count(self, key, amount=1):
+        with self._lock:
+            self.counters[key] = self.counters.get(key, 0) + amount
+
+    @property
+    def duration_ms(self) -> float:
+        return ((self.end or time.perf_counter()) - self.start) * 1000
+
+    def timing_columns(self) -> dict:
+        """Per-prompt timing columns for the result row."""
+        columns = {"latency_ms": round(self.duration_ms, 3)}
+        for column, prefixes in TIMING_GROUPS.items():
+            total = sum(s.duration_ms for s in self.spans if s.name.startswith(prefixes))
+            columns[column] = round(total, 3)
+        local = sum(s.duration_ms for s in self.spans if s.name == "local.query")
+        if local:
+            # What the agent loop spends outside the LLM and tools: prompt templating, output parsing
+            columns["agent_overhead_ms"] = round(
+                max(0.0, local - columns["llm_ms"] - columns["tool_ms"]), 3
+            )
+        columns["tokens"] = sum(s.attrs.get("total_tokens", 0) for s in self.spans)
+        columns["retries"] = self.counters.get("retries", 0)
+        return columns
+
+    def to_dict(self) -> dict:
+        return {
+            "attrs": self.attrs,
+            "start": self.wall_start,
+            "duration_ms": round(self.duration_ms, 3),
+            "counters": self.counters,
+            "spans": [
+                {
+                    "name": s.name,
+                    "parent": s.parent.name if s.parent else None,
+                    "offset_ms": round((s.start - self.start) * 1000, 3),
+                    "duration_ms": round(s.duration_ms, 3),
+                    "thread": s.thread_id,
+                    "attrs": s.attrs,
+                }
+                for s in self.spans
+            ],
+        }
+
+
+class _PromptTrace:
+    def __init__(self, attrs):
+        self.attrs = attrs
+        self.trace = None
+        self._token = None
+
+    def __enter__(self):
+        if not _enabled:
+            return None
+        self.trace = Trace(**self.attrs)
+        self._token = _current_trace.set(self.trace)
+        self.trace.start = time.perf_counter()
+        return self.trace
+
+    def __exit__(self, *exc):
+        if self.trace is None:
+            return False
+        self.trace.end = time.perf_counter()
+        _current_trace.reset(self._token)
+        if _exporter is not None:
+            _exporter.export(self.trace)
+        return False
+
+
+def trace_prompt(**attrs):
+    """Collect every span recorded while handling one prompt; yields None when disabled."""
+    return _PromptTrace(attrs)
+
+
+def span(name: str, **attrs):
+    """Time a stage of the current prompt. Costs one flag check when tracing is off."""
+    if not _enabled:
+        return NOOP_SPAN
+    trace = _current_trace.get()
+    if trace is None:
+        return NOOP_SPAN
+    return Span(trace, name, attrs)
+
+
+def count(key: str, amount: int = 1):
+    """Add to a per-prompt counter such as retries."""
+    if _enabled:
+        trace = _current_trace.get()
+        if trace is not None:
+            trace.count(key, amount)
+
+
+class JsonlExporter:
+    """One JSON line per prompt trace."""
+
+    def __init__(self, path: str):
+        os.makedirs(os.path.dirname(path) or ".", exist_ok=True)
+        self.path = path
+        self._file = open(path, "a", encoding="utf-8")
+        self._lock = threading.Lock()
+
+    def export(self, trace: Trace):
+        line = json.dumps(trace.to_dict(), default=str)
+        with self._lock:
+            self._file.write(line + "\n")
+
+    def close(self):
+        with self._lock:
+            self._file.close()
+
+
+class ChromeTraceExporter:
+    """Writes spans as Chrome trace events, viewable in chrome://tracing or Perfetto."""
+
+    def __init__(self, path: str):
+        os.makedirs(os.path.dirname(path) or ".", exist_ok=True)
+        self.path = path
+        self.events = []
+        self._origin = time.perf_counter()
+        self._lock = threading.Lock()
+
+    def export(self, trace: Trace):
+        pid = os.getpid()
+        events = [{
+            "name": f"prompt {trace.attrs.get('model', '')}/{trace.attrs.get('category', '')}",
+            "ph": "X", "pid": pid, "tid": threading.get_ident(),
+            "ts": (trace.start - self._origin) * 1e6, "dur": trace.duration_ms * 1000,
+            "args": {**trace.attrs, **trace.counters},
+        }]
+        for s in trace.spans:
+            events.append({
+                "name": s.name, "ph": "X", "pid": pid, "tid": s.thread_id,
+                "ts": (s.start - self._origin) * 1e6, "dur": s.duration_ms * 1000,
+                "args": s.attrs,
+            })
+        with self._lock:
+            self.events.extend(events)
+
+    def close(self):
+        with self._lock:
+            with open(self.path, "w", encoding="utf-8") as f:
+                json.dump({"traceEvents": self.events, "displayTimeUnit": "ms"}, f, default=str)
+
+
+def exporter_for(path: str):
+    """Pick an exporter from the file extension: .jsonl → JSONL, anything else → Chrome trace."""
+    return JsonlExporter(path) if path.endswith(".jsonl") else ChromeTraceExporter(path)
@@ -0,0 +1,41 @@
+import asyncio
+from typing import List, Optional
+
+
+class ModelWrapper:
+    """
+    Interface shared by every backend: `query` is required, and the async
+    `aquery`/`abatch` default to running `query` on a worker thread so any
+    wrapper can be driven from an event loop. Backends with a native async
+    client override them.
+    """
+
+    # True for wrappers that retry rate limits themselves, so callers shouldn't add their own backoff
+    handles_retries = False
+
+    def query(self, prompt: str) -> str:
+        raise NotImplementedError
+
+    def query_batch(self, prompts: List[str]) -> List[str]:
+        return [self.query(prompt) for prompt in prompts]
+
+    async def aquery(self, prompt: str) -> str:
+        return await asyncio.to_thread(self.query, prompt)
+
+    async def abatch(self, prompts: List[str], concurrency: Optional[int] = None) -> List[str]:
+        """Query every prompt concurrently, at most `concurrency` at a time; results keep prompt order."""
+        if not concurrency:
+            return list(await asyncio.gather(*(self.aquery(prompt) for prompt in prompts)))
+        semaphore = asyncio.Semaphore(concurrency)
+
+        async def limited(prompt):
+            async with semaphore:
+                return await self.aquery(prompt)
+
+        return list(await asyncio.gather(*(limited(prompt) for prompt in prompts)))
+
+    def close(self):
+        pass
+
+    async def aclose(self):
+        pass
@@ -0,0 +1,196 @@
+import multiprocessing as mp
+import os
+import queue
+import threading
+from concurrent.futures import ThreadPoolExecutor
+from typing import List, Optional
+
+# ✅ Each worker process owns one agent executor (and optional fast path) for its whole lifetime
+_worker_agent = None
+_worker_fast_path = None
+
+
+def _invoke(agent, prompt: str, fast_path=None) -> str:
+    try:
+        if fast_path is not None:
+            output = fast_path.run(prompt)
+            if output is not None:
+                return output
+        result = agent.invoke({"input": prompt})
+        return result["output"] if isinstance(result, dict) else str(result)
+    except Exception as e:
+        return f"[Local Agent Error] {str(e)}"
+
+
+def _worker_main(conn, verbose: bool, fast_path: bool = False):
+    """Build the agent once, then answer batches of prompts until told to stop."""
+    global _worker_agent, _worker_fast_path
+    from agents.local_llm_agent import build_local_agent
+
+    _worker_agent = build_local_agent(verbose=verbose)
+    if fast_path:
+        from agents.fast_path import FastPathExecutor
+        _worker_fast_path = FastPathExecutor()
+    conn.send("ready")
+    while True:
+        try:
+            batch = conn.recv()
+        except EOFError:
+            break
+        if batch is None:
+            break
+        conn.send([_invoke(_worker_agent, prompt, _worker_fast_path) for prompt in batch])
+    from retrievers.chroma_manager import close_service
+    close_service()
+    conn.close()
+
+
+class WorkerFailure(Exception):
+    """Raised when a worker process crashes or exceeds its timeout."""
+
+
+class _Worker:
+    def __init__(self, ctx, verbose: bool, startup_timeout: float, fast_path: bool = False):
+        self.ctx = ctx
+        self.verbose = verbose
+        self.fast_path = fast_path
+        self.startup_timeout = startup_timeout
+        self.process = None
+        self.conn = None
+
+    def start(self):
+        parent_conn, child_conn = self.ctx.Pipe()
+        self.process = self.ctx.Process(
+            target=_worker_main, args=(child_conn, self.verbose, self.fast_path), daemon=True
+        )
+        self.process.start()
+        child_conn.close()
+        self.conn = parent_conn
+        # Agent construction can be slow; wait for it before handing out work
+        self._receive(self.startup_timeout)
+
+    def _receive(self, timeout: float):
+        try:
+            if not self.conn.poll(timeout):
+                raise WorkerFailure(f"worker timed out after {timeout:.0f}s")
+            return self.conn.recv()
+        except (EOFError, OSError) as e:
+            raise WorkerFailure(f"worker crashed: {e}") from e
+
+    def run_batch(self, batch: List[str], timeout: float) -> List[str]:
+        try:
+            self.conn.send(batch)
+        except (BrokenPipeError, OSError) as e:
+            raise WorkerFailure(f"worker crashed: {e}") from e
+        return self._receive(timeout)
+
+    def restart(self):
+        self.stop(graceful=False)
+        self.start()
+
+    def stop(self, graceful: bool = True):
+        if self.process is None:
+            return
+        if graceful and self.process.is_alive():
+            try:
+                self.conn.send(None)
+            except (BrokenPipeError, OSError):
+                pass
+            self.process.join(timeout=5)
+        if self.process.is_alive():
+            self.process.terminate()
+            self.process.join(timeout=5)
+        self.conn.close()
+        self.process = None
+        self.conn = None
+
+
+class LocalAgentPool:
+    """
+    A pool of worker processes, each running its own SimpleLocalLLM agent.
+    Prompts are sent to workers in batches; a worker that crashes or hangs
+    is restarted and its batch is retried prompt by prompt, so one bad prompt
+    only costs its own row.
+    """
+
+    def __init__(
+        self,
+        workers: Optional[int] = None,
+        batch_size: int = 8,
+        prompt_timeout: float = 60.0,
+        startup_timeout: float = 120.0,
+        verbose: bool = False,
+        fast_path: bool = False,
+    ):
+        self.workers = workers or os.cpu_count() or 1
+        self.batch_size = max(1, batch_size)
+        self.prompt_timeout = prompt_timeout
+        self.startup_timeout = startup_timeout
+        self.verbose = verbose
+        self.fast_path = fast_path
+        self._ctx = mp.get_context("spawn")
+        self._idle = queue.Queue()
+        self._all = []
+        self._lock = threading.Lock()
+
+    def start(self):
+        with self._lock:
+            if self._all:
+                return self
+            for _ in range(self.workers):
+                worker = _Worker(self._ctx, self.verbose, self.startup_timeout, self.fast_path)
+                worker.start()
+                self._all.append(worker)
+                self._idle.put(worker)
+        return self
+
+    def close(self):
+        with self._lock:
+            for worker in self._all:
+                worker.stop()
+            self._all = []
+            self._idle = queue.Queue()
+
+    def __enter__(self):
+        return self.start()
+
+    def __exit__(self, *exc):
+        self.close()
+
+    def _run_on_worker(self, batch: List[str]) -> List[str]:
+        worker = self._idle.get()
+        try:
+            try:
+                return worker.run_batch(batch, self.prompt_timeout * len(batch))
+            except WorkerFailure as e:
+                failure = e
+                worker.restart()
+
+            if len(batch) == 1:
+                return [f"[Local Agent Error] {failure}"]
+
+            # Retry one prompt at a time to isolate the prompt that broke the worker
+            results = []
+            for prompt in batch:
+                try:
+                    results.extend(worker.run_batch([prompt], self.prompt_timeout))
+                except WorkerFailure as e:
+                    results.append(f"[Local Agent Error] {e}")
+                    worker.restart()
+            return results
+        finally:
+            self._idle.put(worker)
+
+    def query_batch(self, prompts: List[str]) -> List[str]:
+        """Answer prompts across all workers, returning results in input order."""
+        self.start()
+        batches = [
+            prompts[i:i + self.batch_size] for i in range(0, len(prompts), self.batch_size)
+        ]
+        with ThreadPoolExecutor(max_workers=self.workers) as executor:
+            results = executor.map(self._run_on_worker, batches)
+            return [output for batch in results for output in batch]
+
+    def query(self, prompt: str) -> str:
+        self.start()
+        return self._run_on_worker([prompt])[0]
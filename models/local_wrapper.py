@@ -1,9 +1,58 @@
-from agents.local_llm_agent import local_agent
+import asyncio
+import os
+import sys
+from typing import List, Optional
+
+from evaluation.tracing import span
+from models.base import ModelWrapper
+from models.local_pool import LocalAgentPool
+
+# ✅ Route unambiguous prompts straight to their tool instead of the full agent loop
+FAST_PATH = os.getenv("LOCAL_AGENT_FAST_PATH", "").lower() in ("1", "true", "yes")
+
+class LocalAgentWrapper(ModelWrapper):
+    def __init__(self, workers: Optional[int] = None, batch_size: int = 8,
+                 fast_path: Optional[bool] = None):
+        # workers=None keeps the in-process agent; a number enables the process pool
+        self.fast_path = FAST_PATH if fast_path is None else fast_path
+        self.pool = (
+            LocalAgentPool(workers=workers, batch_size=batch_size, fast_path=self.fast_path) if workers else None
+        )
 
-class LocalAgentWrapper:
     def query(self, prompt: str) -> str:
+        with span("local.query", pooled=self.pool is not None):
+            return self._query(prompt)
+
+    def _query(self, prompt: str) -> str:
+        if self.pool is not None:
+            return self.pool.query(prompt)
         try:
-            result = local_agent.invoke({"input": prompt})
+            # LangChain is only imported once the in-process agent is actually used
+            if self.fast_path:
+                from agents.fast_path import get_fast_path
+                output = get_fast_path().run(prompt)
+                if output is not None:
+                    return output
+            from agents.local_llm_agent import get_local_agent
+            result = get_local_agent().invoke({"input": prompt})
             return result["output"] if isinstance(result, dict) else str(result)
         except Exception as e:
             return f"[Local Agent Error] {str(e)}"
+
+    def query_batch(self, prompts: List[str]) -> List[str]:
+        if self.pool is not None:
+            return self.pool.query_batch(prompts)
+        return [self.query(prompt) for prompt in prompts]
+
+    async def abatch(self, prompts: List[str], concurrency: Optional[int] = None) -> List[str]:
+        # The pool already batches prompts across its workers, so hand it the whole list
+        if self.pool is not None:
+            return await asyncio.to_thread(self.query_batch, prompts)
+        return await super().abatch(prompts, concurrency)
+
+    def close(self):
+        if self.pool is not None:
+            self.pool.close()
+        elif "retrievers.chroma_manager" in sys.modules:
+            # The in-process agent's retrieve_facts tool opened the shared retrieval service
+            sys.modules["retrievers.chroma_manager"].close_service()
@@ -1,21 +1,311 @@
+import asyncio
 import os
+import threading
+import time
+import weakref
+from concurrent.futures import ThreadPoolExecutor
+from dataclasses import dataclass, field
+from typing import List, Optional
 
 from dotenv import load_dotenv
 
 # ✅ Force .env load from correct path
 env_path = os.path.abspath(os.path.join(os.path.dirname(__file__), "..", ".env"))
 load_dotenv(dotenv_path=env_path)
-from openai import OpenAI
-client = OpenAI(api_key=os.getenv("OPENAI_API_KEY"))
 
-class GPT4oWrapper:
+from evaluation.leakage_detector import Finding, StreamScanner, default_detector
+from evaluation.tracing import count, span
+from models.base import ModelWrapper
+from models.rate_limiter import RateLimiter, backoff_delay, get_rate_limiter, retry_after_seconds
+from models.response_cache import ResponseCache
+
+MAX_RETRIES = int(os.getenv("OPENAI_MAX_RETRIES", "5"))
+# Streams stop once a finding of this severity appears ("none" never stops early)
+STREAM_ABORT_SEVERITY = os.getenv("OPENAI_STREAM_ABORT_SEVERITY", "high")
+
+# ✅ HTTP connection pool and timeouts shared by the sync and async clients
+HTTP_MAX_CONNECTIONS = int(os.getenv("OPENAI_HTTP_MAX_CONNECTIONS", "100"))
+HTTP_MAX_KEEPALIVE = int(os.getenv("OPENAI_HTTP_MAX_KEEPALIVE", "20"))
+HTTP_KEEPALIVE_EXPIRY = float(os.getenv("OPENAI_HTTP_KEEPALIVE_EXPIRY", "30"))
+HTTP_CONNECT_TIMEOUT = float(os.getenv("OPENAI_HTTP_CONNECT_TIMEOUT", "10"))
+HTTP_READ_TIMEOUT = float(os.getenv("OPENAI_HTTP_READ_TIMEOUT", "120"))
+
+# ✅ The OpenAI SDK is imported and the client built on first request
+_client = None
+_client_lock = threading.Lock()
+# httpx async pools are bound to the event loop that created them, so keep one per loop
+_async_clients = weakref.WeakKeyDictionary()
+
+
+def _http_options() -> dict:
+    import httpx
+    return {
+        "limits": httpx.Limits(
+            max_connections=HTTP_MAX_CONNECTIONS,
+            max_keepalive_connections=HTTP_MAX_KEEPALIVE,
+            keepalive_expiry=HTTP_KEEPALIVE_EXPIRY,
+        ),
+        "timeout": httpx.Timeout(HTTP_READ_TIMEOUT, connect=HTTP_CONNECT_TIMEOUT),
+    }
+
+
+def get_client():
+    global _client
+    with _client_lock:
+        if _client is None:
+            import httpx
+            from openai import OpenAI
+            # Retries happen in GPT4oWrapper, where they also feed the rate limiter
+            _client = OpenAI(api_key=os.getenv("OPENAI_API_KEY"), max_retries=0,
+                             http_client=httpx.Client(**_http_options()))
+        return _client
+
+
+def get_async_client():
+    """The pooled AsyncOpenAI client for the running event loop."""
+    loop = asyncio.get_running_loop()
+    client = _async_clients.get(loop)
+    if client is None:
+        import httpx
+        from openai import AsyncOpenAI
+        client = AsyncOpenAI(api_key=os.getenv("OPENAI_API_KEY"), max_retries=0,
+                             http_client=httpx.AsyncClient(**_http_options()))
+        _async_clients[loop] = client
+    return client
+
+
+async def close_async_client():
+    """Close the running loop's async client, if one was built."""
+    client = _async_clients.pop(asyncio.get_running_loop(), None)
+    if client is not None:
+        await client.close()
+
+
+def __getattr__(name):
+    if name == "client":
+        return get_client()
+    raise AttributeError(f"module {__name__!r} has no attribute {name!r}")
+
+@dataclass
+class StreamedResponse:
+    text: str
+    findings: List[Finding] = field(default_factory=list)
+    ttft_ms: Optional[float] = None
+    detection_ms: Optional[float] = None
+    aborted: bool = False
+
+
+class ReplayMiss(LookupError):
+    """Raised in replay mode when a prompt has no cached response, so it is recorded as an error."""
+
+
+class GPT4oWrapper(ModelWrapper):
+    # 429s, timeouts and 5xx are retried in _complete under the shared rate limiter
+    handles_retries = True
+
+    def __init__(self, model: str = "gpt-4o", temperature: float = 0,
+                 cache: Optional[ResponseCache] = None, replay: bool = False,
+                 rate_limiter: Optional[RateLimiter] = None, max_retries: int = MAX_RETRIES,
+                 abort_severity: str = STREAM_ABORT_SEVERITY):
+        # replay=True serves only from the cache and never touches the network
+        if replay and cache is None:
+            raise ValueError("Replay mode needs a response cache")
+        self.model = model
+        self.temperature = temperature
+        self.cache = cache
+        self.replay = replay
+        self.rate_limiter = rate_limiter or get_rate_limiter()
+        self.max_retries = max_retries
+        self.abort_severity = abort_severity
+        self._batch_executor = None
+        self._batch_lock = threading.Lock()
+
     def query(self, prompt: str) -> str:
-        try:
-            response = client.chat.completions.create(
-                model="gpt-4o",
-                messages=[{"role": "user", "content": prompt}],
-                temperature=0
-            )
-            return response.choices[0].message.content.strip()
-        except Exception as e:
-            return f"[OpenAI Error] {str(e)}"
+        with span("openai.query", model=self.model) as s:
+            key, cached = self._lookup(prompt, s)
+            if cached is not None:
+                return cached
+            try:
+                content = self._complete(prompt, s)
+            except Exception as e:
+                return f"[OpenAI Error] {str(e)}"
+            self._store(key, content)
+            return content
+
+    def query_batch(self, prompts: List[str]) -> List[str]:
+        """Query prompts side by side; the rate limiter decides how many are actually in flight."""
+        if len(prompts) <= 1:
+            return [self.query(prompt) for prompt in prompts]
+        with self._batch_lock:
+            if self._batch_executor is None:
+                self._batch_executor = ThreadPoolExecutor(
+                    max_workers=self.rate_limiter.concurrency.maximum, thread_name_prefix="openai-batch"
+                )
+        return list(self._batch_executor.map(self.query, prompts))
+
+    def close(self):
+        with self._batch_lock:
+            if self._batch_executor is not None:
+                self._batch_executor.shutdown(wait=True)
+                self._batch_executor = None
+        if self.cache is not None:
+            self.cache.close()
+            self.cache = None
+
+    async def aquery(self, prompt: str) -> str:
+        with span("openai.query", model=self.model, mode="async") as s:
+            key, cached = self._lookup(prompt, s)
+            if cached is not None:
+                return cached
+            try:
+                content = await self._acomplete(prompt, s)
+            except Exception as e:
+                return f"[OpenAI Error] {str(e)}"
+            self._store(key, content)
+            return content
+
+    def query_stream(self, prompt: str, abort_severity: Optional[str] = None) -> StreamedResponse:
+        """
+        Stream the completion through the leakage detector and stop generating
+        as soon as a finding reaches `abort_severity` (default: the wrapper's).
+        Records time to first token and time to first finding; aborted
+        (partial) responses are not cached.
+        """
+        abort_severity = abort_severity or self.abort_severity
+        if abort_severity == "none":
+            abort_severity = None
+        with span("openai.stream", model=self.model) as s:
+            key, cached = self._lookup(prompt, s)
+            if cached is not None:
+                return StreamedResponse(cached, default_detector.scan(cached))
+            try:
+                result = self._stream(prompt, s, abort_severity)
+            except Exception as e:
+                text = f"[OpenAI Error] {str(e)}"
+                return StreamedResponse(text, default_detector.scan(text))
+            s.set(ttft_ms=result.ttft_ms, detection_ms=result.detection_ms, aborted=result.aborted)
+            if not result.aborted:
+                self._store(key, result.text)
+            return result
+
+    async def aclose(self):
+        await close_async_client()
+
+    def _lookup(self, prompt: str, s):
+        """Return (cache key, cached response or None); raises ReplayMiss in replay mode."""
+        if self.cache is None:
+            return None, None
+        key = ResponseCache.make_key(self.model, {"temperature": self.temperature}, prompt)
+        cached = self.cache.get(key)
+        s.set(cache_hit=cached is not None)
+        if cached is None and self.replay:
+            raise ReplayMiss("[Replay Miss] No cached response for this prompt")
+        return key, cached
+
+    def _store(self, key, content: str):
+        if key is not None:
+            self.cache.put(key, self.model, content)
+
+    def _request(self, prompt: str) -> dict:
+        return {
+            "model": self.model,
+            "messages": [{"role": "user", "content": prompt}],
+            "temperature": self.temperature,
+        }
+
+    def _retry_delay(self, error: Exception, attempt: int) -> float:
+        """Backoff before the next attempt; re-raises errors that are final."""
+        import openai
+
+        if isinstance(error, openai.RateLimitError):
+            self.rate_limiter.on_rate_limit()
+        elif not isinstance(error, (openai.APIConnectionError, openai.InternalServerError)):
+            raise error
+        if attempt == self.max_retries:
+            raise error
+        count("retries")
+        return backoff_delay(attempt, retry_after=retry_after_seconds(error))
+
+    def _finish(self, response, estimated: int, s) -> str:
+        usage = response.usage
+        self.rate_limiter.settle(estimated, usage.total_tokens if usage is not None else None)
+        if usage is not None:
+            s.set(prompt_tokens=usage.prompt_tokens,
+                  completion_tokens=usage.completion_tokens,
+                  total_tokens=usage.total_tokens)
+        return response.choices[0].message.content.strip()
+
+    def _complete(self, prompt: str, s) -> str:
+        """One completion under the rate limiter, retrying 429s, timeouts and 5xx with jitter."""
+        limiter = self.rate_limiter
+        estimated = limiter.estimate(prompt)
+        for attempt in range(self.max_retries + 1):
+            try:
+                with limiter.request(estimated):
+                    start = time.monotonic()
+                    response = get_client().chat.completions.create(**self._request(prompt))
+                    limiter.on_success(time.monotonic() - start)
+                return self._finish(response, estimated, s)
+            except Exception as e:
+                time.sleep(self._retry_delay(e, attempt))
+
+    async def _acomplete(self, prompt: str, s) -> str:
+        limiter = self.rate_limiter
+        estimated = limiter.estimate(prompt)
+        for attempt in range(self.max_retries + 1):
+            try:
+                async with limiter.arequest(estimated):
+                    start = time.monotonic()
+                    response = await get_async_client().chat.completions.create(**self._request(prompt))
+                    limiter.on_success(time.monotonic() - start)
+                return self._finish(response, estimated, s)
+            except Exception as e:
+                await asyncio.sleep(self._retry_delay(e, attempt))
+
+    def _stream(self, prompt: str, s, abort_severity: Optional[str]) -> StreamedResponse:
+        limiter = self.rate_limiter
+        estimated = limiter.estimate(prompt)
+        for attempt in range(self.max_retries + 1):
+            # A retried stream starts over, so it gets a fresh scanner
+            scanner = StreamScanner(abort_severity=abort_severity)
+            result = StreamedResponse("")
+            usage = None
+            try:
+                with limiter.request(estimated):
+                    start = time.monotonic()
+                    stream = get_client().chat.completions.create(
+                        **self._request(prompt), stream=True, stream_options={"include_usage": True}
+                    )
+                    try:
+                        for chunk in stream:
+                            if chunk.usage is not None:
+                                usage = chunk.usage
+                            delta = chunk.choices[0].delta.content if chunk.choices else None
+                            if not delta:
+                                continue
+                            elapsed_ms = round((time.monotonic() - start) * 1000, 3)
+                            if result.ttft_ms is None:
+                                result.ttft_ms = elapsed_ms
+                            if scanner.feed(delta) and result.detection_ms is None:
+                                result.detection_ms = elapsed_ms
+                            if scanner.should_abort:
+                                result.aborted = True
+                                break
+                        # A value at the very end was held back in case more text followed
+                        if scanner.finish() and result.detection_ms is None:
+                            result.detection_ms = round((time.monotonic() - start) * 1000, 3)
+                    finally:
+                        # Closing the connection is what stops generation (and billing) early
+                        stream.close()
+                    limiter.on_success(time.monotonic() - start)
+            except Exception as e:
+                time.sleep(self._retry_delay(e, attempt))
+                continue
+            limiter.settle(estimated, usage.total_tokens if usage is not None else None)
+            if usage is not None:
+                s.set(prompt_tokens=usage.prompt_tokens,
+                      completion_tokens=usage.completion_tokens,
+                      total_tokens=usage.total_tokens)
+            result.text = scanner.text.strip()
+            result.findings = default_detector.scan(result.text)
+            return result
@@ -0,0 +1,217 @@
+import asyncio
+import os
+import random
+import threading
+import time
+from contextlib import asynccontextmanager, contextmanager
+from typing import Optional
+
+# ✅ Quotas default to .env values; tune them to the account's tier
+DEFAULT_RPM = int(os.getenv("OPENAI_RPM", "500"))
+DEFAULT_TPM = int(os.getenv("OPENAI_TPM", "30000"))
+DEFAULT_MAX_CONCURRENCY = int(os.getenv("OPENAI_MAX_CONCURRENCY", "16"))
+# Completions have no max_tokens set, so reserve this many output tokens per request
+EXPECTED_OUTPUT_TOKENS = int(os.getenv("OPENAI_EXPECTED_OUTPUT_TOKENS", "256"))
+
+_encodings = {}
+_encodings_lock = threading.Lock()
+
+
+def estimate_tokens(text: str, model: str = "gpt-4o") -> int:
+    """Count prompt tokens with tiktoken, falling back to ~4 characters per token."""
+    with _encodings_lock:
+        if model not in _encodings:
+            try:
+                import tiktoken
+                try:
+                    _encodings[model] = tiktoken.encoding_for_model(model)
+                except KeyError:
+                    _encodings[model] = tiktoken.get_encoding("o200k_base")
+            except ImportError:
+                _encodings[model] = None
+        encoding = _encodings[model]
+    if encoding is None:
+        return max(1, len(text) // 4)
+    return len(encoding.encode(text))
+
+
+class TokenBucket:
+    """Classic token bucket: holds up to `capacity`, refills at `rate` per second."""
+
+    def __init__(self, capacity: float, rate: float):
+        self.capacity = capacity
+        self.rate = rate
+        self.tokens = capacity
+        self.updated = time.monotonic()
+        self._lock = threading.Lock()
+
+    def _refill(self, now: float):
+        self.tokens = min(self.capacity, self.tokens + (now - self.updated) * self.rate)
+        self.updated = now
+
+    def _take(self, amount: float) -> float:
+        """Take `amount` if available and return 0, otherwise return how long to wait."""
+        amount = min(amount, self.capacity)
+        with self._lock:
+            self._refill(time.monotonic())
+            if self.tokens >= amount:
+                self.tokens -= amount
+                return 0.0
+            return (amount - self.tokens) / self.rate
+
+    def acquire(self, amount: float = 1.0):
+        """Block until `amount` is available, then take it."""
+        while (wait := self._take(amount)) > 0:
+            time.sleep(wait)
+
+    async def acquire_async(self, amount: float = 1.0):
+        while (wait := self._take(amount)) > 0:
+            await asyncio.sleep(wait)
+
+    def adjust(self, amount: float):
+        """Return (positive) or charge (negative) tokens after the real cost is known."""
+        with self._lock:
+            self._refill(time.monotonic())
+            self.tokens = min(self.capacity, self.tokens + amount)
+
+
+class AdaptiveConcurrency:
+    """
+    AIMD concurrency limit: grows by roughly one slot per window of fast
+    successes, halves on a 429 (at most once per cooldown), and shrinks
+    gently when latency goes above the target.
+    """
+
+    def __init__(self, initial: int = 4, minimum: int = 1, maximum: int = DEFAULT_MAX_CONCURRENCY,
+                 target_latency: float = 10.0, cooldown: float = 2.0):
+        self.limit = float(initial)
+        self.minimum = minimum
+        self.maximum = maximum
+        self.target_latency = target_latency
+        self.cooldown = cooldown
+        self.in_flight = 0
+        self._last_decrease = 0.0
+        self._cond = threading.Condition()
+
+    def _try_enter(self) -> bool:
+        with self._cond:
+            if self.in_flight >= int(self.limit):
+                return False
+            self.in_flight += 1
+            return True
+
+    def _leave(self):
+        with self._cond:
+            self.in_flight -= 1
+            self._cond.notify_all()
+
+    @contextmanager
+    def slot(self):
+        with self._cond:
+            while self.in_flight >= int(self.limit):
+                self._cond.wait()
+            self.in_flight += 1
+        try:
+            yield
+        finally:
+            self._leave()
+
+    @asynccontextmanager
+    async def aslot(self, poll_interval: float = 0.01):
+        # Coroutines can't wait on the thread condition, so they poll instead
+        while not self._try_enter():
+            await asyncio.sleep(poll_interval)
+        try:
+            yield
+        finally:
+            self._leave()
+
+    def on_success(self, latency: float):
+        with self._cond:
+            if latency <= self.target_latency:
+                self.limit = min(self.maximum, self.limit + 1.0 / self.limit)
+            else:
+                self.limit = max(self.minimum, self.limit * 0.9)
+            self._cond.notify_all()
+
+    def on_rate_limit(self):
+        with self._cond:
+            now = time.monotonic()
+            if now - self._last_decrease >= self.cooldown:
+                self.limit = max(self.minimum, self.limit / 2)
+                self._last_decrease = now
+
+
+class RateLimiter:
+    """
+    Client-side limits for one hosted model: request and token buckets sized
+    to the per-minute quotas, plus an adaptive concurrency limit.
+    """
+
+    def __init__(self, rpm: int = DEFAULT_RPM, tpm: int = DEFAULT_TPM,
+                 max_concurrency: int = DEFAULT_MAX_CONCURRENCY, model: str = "gpt-4o"):
+        self.model = model
+        self.requests = TokenBucket(capacity=rpm, rate=rpm / 60.0)
+        self.tokens = TokenBucket(capacity=tpm, rate=tpm / 60.0)
+        self.concurrency = AdaptiveConcurrency(maximum=max_concurrency)
+
+    def estimate(self, prompt: str) -> int:
+        return estimate_tokens(prompt, self.model) + EXPECTED_OUTPUT_TOKENS
+
+    @contextmanager
+    def request(self, estimated_tokens: int):
+        """Wait for quota and a concurrency slot, then hold the slot for the call."""
+        self.requests.acquire(1)
+        self.tokens.acquire(estimated_tokens)
+        with self.concurrency.slot():
+            yield
+
+    @asynccontextmanager
+    async def arequest(self, estimated_tokens: int):
+        await self.requests.acquire_async(1)
+        await self.tokens.acquire_async(estimated_tokens)
+        async with self.concurrency.aslot():
+            yield
+
+    def settle(self, estimated_tokens: int, actual_tokens: Optional[int]):
+        if actual_tokens is not None:
+            self.tokens.adjust(estimated_tokens - actual_tokens)
+
+    def on_success(self, latency: float):
+        self.concurrency.on_success(latency)
+
+    def on_rate_limit(self):
+        self.concurrency.on_rate_limit()
+
+
+def backoff_delay(attempt: int, base: float = 0.5, cap: float = 30.0, retry_after: Optional[float] = None) -> float:
+    """Full-jitter exponential backoff, never shorter than a server-provided retry-after."""
+    delay = random.uniform(0, min(cap, base * (2 ** attempt)))
+    return max(delay, retry_after or 0.0)
+
+
+def retry_after_seconds(error) -> Optional[float]:
+    """Read retry-after(-ms) headers from an OpenAI SDK error, if present."""
+    response = getattr(error, "response", None)
+    headers = getattr(response, "headers", None) or {}
+    try:
+        if "retry-after-ms" in headers:
+            return float(headers["retry-after-ms"]) / 1000
+        if "retry-after" in headers:
+            return float(headers["retry-after"])
+    except (TypeError, ValueError):
+        return None
+    return None
+
+
+_default_limiter = None
+_default_lock = threading.Lock()
+
+
+def get_rate_limiter() -> RateLimiter:
+    """Process-wide limiter shared by every GPT4oWrapper that doesn't bring its own."""
+    global _default_limiter
+    with _default_lock:
+        if _default_limiter is None:
+            _default_limiter = RateLimiter()
+        return _default_limiter
@@ -0,0 +1,74 @@
+import threading
+from collections.abc import Mapping
+from typing import Callable, Dict
+
+
+def _build_openai():
+    from models.openai_wrapper import GPT4oWrapper
+    return GPT4oWrapper()
+
+
+def _build_local():
+    from models.local_wrapper import LocalAgentWrapper
+    return LocalAgentWrapper()
+
+
+# ✅ Backends the runner knows about, by name
+DEFAULT_FACTORIES: Dict[str, Callable[[], object]] = {
+    "openai": _build_openai,
+    "local": _build_local,
+}
+
+
+class ModelRegistry(Mapping):
+    """
+    Maps model names to wrappers, building each wrapper with its factory the
+    first time it is looked up. Runs that only touch one backend never import
+    or initialise the others.
+    """
+
+    def __init__(self, factories=None):
+        self._factories = dict(DEFAULT_FACTORIES if factories is None else factories)
+        self._instances = {}
+        self._lock = threading.Lock()
+
+    def register(self, name: str, factory: Callable[[], object]):
+        """Add or replace a backend; any already-built instance is closed and dropped."""
+        with self._lock:
+            self._factories[name] = factory
+            old = self._instances.pop(name, None)
+        if old is not None and hasattr(old, "close"):
+            old.close()
+
+    def __getitem__(self, name):
+        with self._lock:
+            if name not in self._instances:
+                if name not in self._factories:
+                    raise KeyError(name)
+                self._instances[name] = self._factories[name]()
+            return self._instances[name]
+
+    def __iter__(self):
+        return iter(self._factories)
+
+    def __len__(self):
+        return len(self._factories)
+
+    def is_built(self, name: str) -> bool:
+        return name in self._instances
+
+    def close_all(self):
+        """Close every wrapper that was actually built."""
+        with self._lock:
+            instances = list(self._instances.values())
+        for instance in instances:
+            if hasattr(instance, "close"):
+                instance.close()
+
+    async def aclose_all(self):
+        """Release async resources, such as pooled HTTP clients, of every built wrapper."""
+        with self._lock:
+            instances = list(self._instances.values())
+        for instance in instances:
+            if hasattr(instance, "aclose"):
+                await instance.aclose()
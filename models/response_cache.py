@@ -0,0 +1,98 @@
+import hashlib
+import json
+import os
+import sqlite3
+import threading
+import time
+from typing import Optional
+
+DEFAULT_CACHE_PATH = "results/response_cache.sqlite3"
+
+
+class ResponseCache:
+    """
+    Persistent model-response cache in a local SQLite file.
+    Entries are keyed by model, request parameters and a hash of the prompt,
+    expire after `ttl` seconds, and the least recently used entries are
+    evicted once the cache holds more than `max_entries`.
+    """
+
+    def __init__(self, path: str = DEFAULT_CACHE_PATH, ttl: Optional[float] = None,
+                 max_entries: Optional[int] = None):
+        self.path = path
+        self.ttl = ttl
+        self.max_entries = max_entries
+        self.hits = 0
+        self.misses = 0
+        self._lock = threading.Lock()
+        os.makedirs(os.path.dirname(path) or ".", exist_ok=True)
+        self._conn = sqlite3.connect(path, check_same_thread=False)
+        with self._conn:
+            self._conn.execute("PRAGMA journal_mode=WAL")
+            self._conn.execute(
+                """
+                CREATE TABLE IF NOT EXISTS responses (
+                    key TEXT PRIMARY KEY,
+                    model TEXT NOT NULL,
+                    response TEXT NOT NULL,
+                    created_at REAL NOT NULL,
+                    last_access REAL NOT NULL
+                )
+                """
+            )
+            self._conn.execute(
+                "CREATE INDEX IF NOT EXISTS idx_responses_last_access ON responses (last_access)"
+            )
+
+    @staticmethod
+    def make_key(model: str, params: dict, prompt: str) -> str:
+        prompt_hash = hashlib.sha256(prompt.encode("utf-8")).hexdigest()
+        payload = json.dumps({"model": model, "params": params, "prompt": prompt_hash}, sort_keys=True)
+        return hashlib.sha256(payload.encode("utf-8")).hexdigest()
+
+    def get(self, key: str) -> Optional[str]:
+        now = time.time()
+        with self._lock:
+            row = self._conn.execute(
+                "SELECT response, created_at FROM responses WHERE key = ?", (key,)
+            ).fetchone()
+            if row is None:
+                self.misses += 1
+                return None
+            response, created_at = row
+            with self._conn:
+                if self.ttl is not None and now - created_at > self.ttl:
+                    self._conn.execute("DELETE FROM responses WHERE key = ?", (key,))
+                    self.misses += 1
+                    return None
+                self._conn.execute("UPDATE responses SET last_access = ? WHERE key = ?", (now, key))
+            self.hits += 1
+            return response
+
+    def put(self, key: str, model: str, response: str):
+        now = time.time()
+        with self._lock, self._conn:
+            self._conn.execute(
+                "INSERT OR REPLACE INTO responses (key, model, response, created_at, last_access) "
+                "VALUES (?, ?, ?, ?, ?)",
+                (key, model, response, now, now),
+            )
+            self._evict(now)
+
+    def _evict(self, now: float):
+        if self.ttl is not None:
+            self._conn.execute("DELETE FROM responses WHERE created_at < ?", (now - self.ttl,))
+        if self.max_entries is not None:
+            self._conn.execute(
+                "DELETE FROM responses WHERE key IN ("
+                "SELECT key FROM responses ORDER BY last_access DESC LIMIT -1 OFFSET ?)",
+                (self.max_entries,),
+            )
+
+    def __len__(self):
+        with self._lock:
+            return self._conn.execute("SELECT COUNT(*) FROM responses").fetchone()[0]
+
+    def close(self):
+        with self._lock:
+            self._conn.close()
@@ -1,38 +1,232 @@
+import hashlib
+import json
 import os
-from langchain.vectorstores import Chroma
-from langchain.embeddings import OpenAIEmbeddings
-from langchain.document_loaders import TextLoader
+import threading
+from contextlib import contextmanager
 from langchain.text_splitter import CharacterTextSplitter
 
+from retrievers.embeddings import embedding_namespace, get_embedding_function
+from retrievers.retrieval_service import HNSW_METADATA, MANIFEST_FILE, PERSIST_DIR, RetrievalService
+
+try:
+    import fcntl
+except ImportError:  # Windows: syncs are only serialised within one process
+    fcntl = None
+
 # Define where the knowledge text is
 DATA_DIR = "data/example_docs"
-PERSIST_DIR = "chroma_store"
-
-# Load and chunk documents
-documents = []
-for file in os.listdir(DATA_DIR):
-    if file.endswith(".txt"):
-        loader = TextLoader(os.path.join(DATA_DIR, file), encoding="utf-8")
-        documents.extend(loader.load())
+MANIFEST_PATH = os.path.join(PERSIST_DIR, MANIFEST_FILE)
+SYNC_LOCK_PATH = os.path.join(PERSIST_DIR, "sync.lock")
 
 text_splitter = CharacterTextSplitter(chunk_size=500, chunk_overlap=50)
-docs = text_splitter.split_documents(documents)
-
-# Build or load the vectorstore
-if os.path.exists(PERSIST_DIR):
-    print("📁 Loading existing Chroma vector store...")
-    vectorstore = Chroma(persist_directory=PERSIST_DIR, embedding_function=OpenAIEmbeddings())
-else:
-    print("🔧 Building new Chroma vector store...")
-    vectorstore = Chroma.from_documents(
-        docs, OpenAIEmbeddings(), persist_directory=PERSIST_DIR
+
+
+def _sha256(data: bytes) -> str:
+    return hashlib.sha256(data).hexdigest()
+
+
+def load_manifest(path: str = MANIFEST_PATH) -> dict:
+    """Manifest layout: {"embedding": namespace, "files": {source: {"hash": ..., "chunk_ids": [...]}}}."""
+    if not os.path.exists(path):
+        return {"files": {}}
+    with open(path, "r", encoding="utf-8") as f:
+        return json.load(f)
+
+
+def save_manifest(manifest: dict, path: str = MANIFEST_PATH):
+    os.makedirs(os.path.dirname(path), exist_ok=True)
+    tmp_path = path + ".tmp"
+    with open(tmp_path, "w", encoding="utf-8") as f:
+        json.dump(manifest, f, indent=2, sort_keys=True)
+    os.replace(tmp_path, path)
+
+
+def scan_sources(data_dir: str = DATA_DIR) -> dict:
+    """Hash every .txt file in the data directory: {source: (hash, text)}."""
+    sources = {}
+    for file in sorted(os.listdir(data_dir)):
+        if file.endswith(".txt"):
+            path = os.path.join(data_dir, file)
+            with open(path, "rb") as f:
+                raw = f.read()
+            sources[path] = (_sha256(raw), raw.decode("utf-8"))
+    return sources
+
+
+def chunk_source(source: str, text: str):
+    """Split one file and give each chunk an id derived from its source and content."""
+    chunks = []
+    seen = {}
+    for chunk in text_splitter.split_text(text):
+        # Ids ignore position so an edit only re-embeds the chunks it touched
+        occurrence = seen[chunk] = seen.get(chunk, -1) + 1
+        chunk_id = _sha256(f"{source}\0{occurrence}\0{chunk}".encode("utf-8"))
+        chunks.append((chunk_id, chunk))
+    return chunks
+
+
+def reset_collection(vectorstore):
+    """Drop and recreate the collection, so vectors of a different width can be added."""
+    name = vectorstore._collection.name
+    vectorstore.delete_collection()
+    vectorstore._collection = vectorstore._client.get_or_create_collection(
+        name=name, embedding_function=None, metadata=HNSW_METADATA,
     )
 
-# ✅ Export this so tools can use it
-retriever = vectorstore.as_retriever()
+
+@contextmanager
+def sync_lock(path: str = SYNC_LOCK_PATH):
+    """Hold an exclusive file lock so only one process syncs the store at a time."""
+    if fcntl is None:
+        yield
+        return
+    os.makedirs(os.path.dirname(path) or ".", exist_ok=True)
+    with open(path, "a") as f:
+        fcntl.flock(f, fcntl.LOCK_EX)
+        try:
+            yield
+        finally:
+            fcntl.flock(f, fcntl.LOCK_UN)
+
+
+def sync_index(vectorstore, data_dir: str = DATA_DIR, manifest_path: str = MANIFEST_PATH) -> dict:
+    """
+    Bring the vectorstore in line with the data directory.
+    Only chunks from new or changed files are embedded; chunks whose source
+    file changed or disappeared are deleted. Returns counts of the changes.
+    The manifest is only rewritten when something changed, so its mtime
+    doubles as the index version that invalidates retrieval caches.
+    The whole index is rebuilt when the embedding backend or model differs
+    from the one recorded in the manifest.
+    """
+    manifest = load_manifest(manifest_path)
+    known = manifest["files"]
+    sources = scan_sources(data_dir)
+    stats = {"added": 0, "deleted": 0, "unchanged_files": 0}
+    changed = not os.path.exists(manifest_path)
+    namespace = embedding_namespace(vectorstore.embeddings)
+
+    # A store built before manifests existed has no chunk ids we can match on, and a store
+    # embedded by another backend holds vectors that aren't comparable (or even the same width)
+    indexed_with = manifest.get("embedding") if not changed else None
+    if indexed_with != namespace:
+        existing = len(vectorstore.get(include=[])["ids"])
+        if existing:
+            previous = indexed_with or "an unrecorded backend"
+            print(f"♻️ Reindexing Chroma store ({existing} chunks) from {previous} to {namespace}...")
+            reset_collection(vectorstore)
+            stats["deleted"] += existing
+        known.clear()
+        manifest["embedding"] = namespace
+        changed = True
+
+    stale_ids = []
+    for source in list(known):
+        if source not in sources:
+            stale_ids.extend(known.pop(source)["chunk_ids"])
+            changed = True
+
+    for source, (file_hash, text) in sources.items():
+        entry = known.get(source)
+        if entry and entry["hash"] == file_hash:
+            stats["unchanged_files"] += 1
+            continue
+
+        changed = True
+        old_ids = set(entry["chunk_ids"]) if entry else set()
+        chunks = chunk_source(source, text)
+        new_chunks = [(cid, chunk) for cid, chunk in chunks if cid not in old_ids]
+        stale_ids.extend(old_ids - {cid for cid, _ in chunks})
+
+        if new_chunks:
+            vectorstore.add_texts(
+                texts=[chunk for _, chunk in new_chunks],
+                metadatas=[{"source": source} for _ in new_chunks],
+                ids=[cid for cid, _ in new_chunks],
+            )
+            stats["added"] += len(new_chunks)
+        known[source] = {"hash": file_hash, "chunk_ids": [cid for cid, _ in chunks]}
+
+    if stale_ids:
+        vectorstore.delete(ids=list(stale_ids))
+        stats["deleted"] += len(stale_ids)
+
+    if changed:
+        save_manifest(manifest, manifest_path)
+    return stats
+
+
+# ✅ Build or load the vectorstore on first use, then apply only what changed on disk
+_vectorstore = None
+_vectorstore_lock = threading.Lock()
+
+
+def get_vectorstore():
+    global _vectorstore
+    with _vectorstore_lock:
+        if _vectorstore is None:
+            from langchain.vectorstores import Chroma
+            # Pool workers open the store together; the first syncs it and the rest find it current
+            with sync_lock():
+                store = Chroma(
+                    persist_directory=PERSIST_DIR,
+                    embedding_function=get_embedding_function(),
+                    collection_metadata=HNSW_METADATA,
+                )
+                index_stats = sync_index(store)
+            if index_stats["added"] or index_stats["deleted"]:
+                print(f"🔧 Chroma index updated: +{index_stats['added']} / -{index_stats['deleted']} chunks")
+            else:
+                print("📁 Chroma vector store is up to date.")
+            _vectorstore = store
+        return _vectorstore
+
+
+def __getattr__(name):
+    # ✅ Export these so tools can use them
+    if name == "vectorstore":
+        return get_vectorstore()
+    if name == "retriever":
+        return get_vectorstore().as_retriever()
+    raise AttributeError(f"module {__name__!r} has no attribute {name!r}")
+
+
+_service = None
+
+
+def get_service() -> RetrievalService:
+    """Retrieval service over the synced vectorstore, for scored and batched queries."""
+    global _service
+    store = get_vectorstore()
+    with _vectorstore_lock:
+        if _service is None:
+            _service = RetrievalService(vectorstore=store)
+        return _service
+
+
+def close_service():
+    """Close the shared service and vectorstore; the next search reopens and resyncs them."""
+    global _service, _vectorstore
+    with _vectorstore_lock:
+        if _service is not None:
+            _service.close()
+            _service = None
+        if _vectorstore is not None:
+            client = getattr(_vectorstore, "_client", None)
+            if client is not None and hasattr(client, "close"):
+                client.close()
+            _vectorstore = None
+
+
+def search_facts(queries, k: int = 1):
+    """Scored top-k hits for many queries in one batched vector query."""
+    return get_service().search(list(queries), k=k)
+
+
 def retrieve_top_fact(query: str, k: int = 1) -> str:
     """
-    Retrieve the top-matching fact from the Chroma vector store.
+    Retrieve the top-k matching facts from the Chroma vector store,
+    joined by newlines (best match first).
     """
-    docs = retriever.get_relevant_documents(query)
-    return docs[0].page_content if docs else "No match found."
+    hits = search_facts([query], k=k)[0]
+    return "\n".join(hit.content for hit in hits) if hits else "No match found."
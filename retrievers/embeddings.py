@@ -0,0 +1,236 @@
+import hashlib
+import os
+import threading
+from contextlib import contextmanager
+from typing import Dict, List, Optional
+
+import numpy as np
+from langchain_core.embeddings import Embeddings
+
+try:
+    import fcntl
+except ImportError:  # Windows: writers are only serialised within one process
+    fcntl = None
+
+# ✅ Backend selection and cache location can be overridden from .env
+EMBEDDING_BACKEND = os.getenv("EMBEDDING_BACKEND", "openai")
+LOCAL_EMBEDDING_MODEL = os.getenv("LOCAL_EMBEDDING_MODEL", "all-MiniLM-L6-v2")
+EMBEDDING_CACHE_DIR = os.getenv("EMBEDDING_CACHE_DIR", "embedding_cache")
+
+
+class LocalSentenceTransformerEmbeddings(Embeddings):
+    """
+    Offline embeddings from a sentence-transformers model.
+    The model is loaded on first use and texts are encoded in batches.
+    """
+
+    def __init__(self, model_name: str = LOCAL_EMBEDDING_MODEL, batch_size: int = 32,
+                 device: Optional[str] = None):
+        self.model_name = model_name
+        self.batch_size = batch_size
+        self.device = device
+        self._model = None
+        self._lock = threading.Lock()
+
+    def _load(self):
+        with self._lock:
+            if self._model is None:
+                from sentence_transformers import SentenceTransformer
+                self._model = SentenceTransformer(self.model_name, device=self.device)
+        return self._model
+
+    def embed_documents(self, texts: List[str]) -> List[List[float]]:
+        if not texts:
+            return []
+        vectors = self._load().encode(
+            list(texts),
+            batch_size=self.batch_size,
+            convert_to_numpy=True,
+            normalize_embeddings=True,
+            show_progress_bar=False,
+        )
+        return vectors.astype(np.float32).tolist()
+
+    def embed_query(self, text: str) -> List[float]:
+        return self.embed_documents([text])[0]
+
+
+class EmbeddingCache:
+    """
+    Content-hash keyed vectors stored as a memory-mapped float32 matrix.
+    `vectors.f32` holds one row per entry and `keys.txt` holds the matching
+    hashes, one per line, so row i belongs to line i.
+
+    Several processes can share one cache (agent pool workers, sharded
+    runners, the evaluation service): writers hold an exclusive lock on
+    `cache.lock`, catch up on keys other processes appended, and only then
+    pick the next free row.
+    """
+
+    def __init__(self, cache_dir: str, dim: Optional[int] = None):
+        self.cache_dir = cache_dir
+        self.vectors_path = os.path.join(cache_dir, "vectors.f32")
+        self.keys_path = os.path.join(cache_dir, "keys.txt")
+        self.lock_path = os.path.join(cache_dir, "cache.lock")
+        self.dim = dim
+        self._rows: Dict[str, int] = {}
+        self._count = 0
+        self._offset = 0
+        self._matrix = None
+        self._capacity = 0
+        self._lock = threading.Lock()
+        os.makedirs(cache_dir, exist_ok=True)
+        with self._lock, self._file_lock():
+            self._refresh()
+
+    @staticmethod
+    def key(text: str) -> str:
+        return hashlib.sha256(text.encode("utf-8")).hexdigest()
+
+    def __len__(self):
+        return len(self._rows)
+
+    @contextmanager
+    def _file_lock(self):
+        if fcntl is None:
+            yield
+            return
+        with open(self.lock_path, "a") as f:
+            fcntl.flock(f, fcntl.LOCK_EX)
+            try:
+                yield
+            finally:
+                fcntl.flock(f, fcntl.LOCK_UN)
+
+    def _refresh(self):
+        """Read keys appended since the last refresh. Call with the file lock held."""
+        if not os.path.exists(self.keys_path):
+            return
+        with open(self.keys_path, "rb+") as f:
+            if self._offset == 0:
+                header = f.readline().decode("utf-8").strip()
+                if not header.startswith("dim="):
+                    return
+                self.dim = int(header[4:])
+                self._offset = f.tell()
+            f.seek(self._offset)
+            for line in f:
+                if not line.endswith(b"\n"):
+                    # A writer died mid-line; drop the fragment so the next key starts cleanly
+                    f.truncate(self._offset)
+                    break
+                self._rows.setdefault(line.decode("utf-8").strip(), self._count)
+                self._count += 1
+                self._offset += len(line)
+        size = os.path.getsize(self.vectors_path) if os.path.exists(self.vectors_path) else 0
+        if size // (self.dim * 4) != self._capacity:
+            self._map(size // (self.dim * 4))
+
+    def _map(self, capacity: int):
+        self._capacity = capacity
+        self._matrix = (
+            np.memmap(self.vectors_path, dtype=np.float32, mode="r+", shape=(capacity, self.dim))
+            if capacity else None
+        )
+
+    def _grow(self, needed: int):
+        if needed <= self._capacity:
+            return
+        capacity = max(needed, self._capacity * 2, 1024)
+        if self._matrix is not None:
+            self._matrix.flush()
+        with open(self.vectors_path, "ab") as f:
+            f.truncate(capacity * self.dim * 4)
+        self._map(capacity)
+
+    def get_many(self, keys: List[str]) -> Dict[str, np.ndarray]:
+        with self._lock:
+            return {
+                key: np.array(self._matrix[self._rows[key]])
+                for key in keys if key in self._rows
+            }
+
+    def put_many(self, entries: Dict[str, List[float]]):
+        with self._lock, self._file_lock():
+            self._refresh()
+            entries = {k: v for k, v in entries.items() if k not in self._rows}
+            if not entries:
+                return
+            if self.dim is None:
+                self.dim = len(next(iter(entries.values())))
+                header = f"dim={self.dim}\n".encode("utf-8")
+                with open(self.keys_path, "wb") as f:
+                    f.write(header)
+                self._offset = len(header)
+            start = self._count
+            self._grow(start + len(entries))
+            self._matrix[start:start + len(entries)] = np.asarray(
+                list(entries.values()), dtype=np.float32
+            )
+            self._matrix.flush()
+            # Keys are written after the vectors so a crash never points at an empty row
+            lines = "".join(key + "\n" for key in entries).encode("utf-8")
+            with open(self.keys_path, "ab") as f:
+                f.write(lines)
+            for row, key in enumerate(entries, start):
+                self._rows[key] = row
+            self._count += len(entries)
+            self._offset += len(lines)
+
+
+class CachedEmbeddings(Embeddings):
+    """Wraps any embedding backend so each distinct text is only embedded once."""
+
+    def __init__(self, backend: Embeddings, cache: EmbeddingCache):
+        self.backend = backend
+        self.cache = cache
+
+    def embed_documents(self, texts: List[str]) -> List[List[float]]:
+        keys = [EmbeddingCache.key(text) for text in texts]
+        found = self.cache.get_many(keys)
+
+        missing = {}
+        for key, text in zip(keys, texts):
+            if key not in found and key not in missing:
+                missing[key] = text
+        if missing:
+            vectors = self.backend.embed_documents(list(missing.values()))
+            new_entries = dict(zip(missing.keys(), vectors))
+            self.cache.put_many(new_entries)
+            found.update({k: np.asarray(v, dtype=np.float32) for k, v in new_entries.items()})
+
+        return [found[key].tolist() for key in keys]
+
+    def embed_query(self, text: str) -> List[float]:
+        return self.embed_documents([text])[0]
+
+
+def embedding_namespace(embeddings: Embeddings) -> str:
+    """Backend and model an embedding function stands for, e.g. "openai-text-embedding-ada-002"."""
+    if isinstance(embeddings, CachedEmbeddings):
+        return embedding_namespace(embeddings.backend)
+    if isinstance(embeddings, LocalSentenceTransformerEmbeddings):
+        return f"local-{embeddings.model_name.replace('/', '_')}"
+    model = getattr(embeddings, "model", None) or getattr(embeddings, "model_name", None)
+    prefix = "openai" if type(embeddings).__name__ == "OpenAIEmbeddings" else type(embeddings).__name__
+    return f"{prefix}-{model}" if model else prefix
+
+
+def get_embedding_function(backend: Optional[str] = None, cache: bool = True) -> Embeddings:
+    """
+    Build the configured embedding backend ("openai" or "local"), wrapped in
+    an on-disk cache namespaced by backend and model.
+    """
+    backend = (backend or EMBEDDING_BACKEND).lower()
+    if backend == "local":
+        embeddings = LocalSentenceTransformerEmbeddings()
+    elif backend == "openai":
+        from langchain_community.embeddings import OpenAIEmbeddings
+        embeddings = OpenAIEmbeddings()
+    else:
+        raise ValueError(f"Unknown embedding backend '{backend}', expected 'openai' or 'local'")
+
+    if not cache:
+        return embeddings
+    namespace = embedding_namespace(embeddings)
+    return CachedEmbeddings(embeddings, EmbeddingCache(os.path.join(EMBEDDING_CACHE_DIR, namespace)))
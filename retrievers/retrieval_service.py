@@ -0,0 +1,162 @@
+import os
+import threading
+from dataclasses import dataclass, field
+from typing import List, Optional
+
+from evaluation.tracing import span
+from retrievers.embeddings import get_embedding_function
+from retrievers.semantic_cache import SemanticCache
+
+PERSIST_DIR = os.getenv("CHROMA_PERSIST_DIR", "chroma_store")
+# Written by chroma_manager.sync_index whenever the index changes
+MANIFEST_FILE = "manifest.json"
+
+# ✅ HNSW index parameters. M and construction_ef only apply when a collection is created;
+# search_ef can be changed later (RetrievalService.set_search_ef) to trade recall against latency.
+HNSW_M = int(os.getenv("CHROMA_HNSW_M", "16"))
+HNSW_CONSTRUCTION_EF = int(os.getenv("CHROMA_HNSW_CONSTRUCTION_EF", "100"))
+HNSW_SEARCH_EF = int(os.getenv("CHROMA_HNSW_SEARCH_EF", "100"))
+HNSW_METADATA = {
+    "hnsw:M": HNSW_M,
+    "hnsw:construction_ef": HNSW_CONSTRUCTION_EF,
+    "hnsw:search_ef": HNSW_SEARCH_EF,
+}
+
+
+@dataclass(frozen=True)
+class ScoredHit:
+    content: str
+    distance: float
+    metadata: dict = field(default_factory=dict)
+    id: Optional[str] = None
+
+
+def set_search_ef(collection, ef: int):
+    """
+    Change HNSW search_ef on a collection (Chroma >= 1.0 config, else legacy
+    metadata). This is stored with the collection, so it outlasts the process.
+    """
+    try:
+        collection.modify(configuration={"hnsw": {"ef_search": ef}})
+    except TypeError:
+        metadata = dict(collection.metadata or {})
+        metadata["hnsw:search_ef"] = ef
+        collection.modify(metadata=metadata)
+
+
+class RetrievalService:
+    """
+    Owns one Chroma vectorstore and one embedding client for its whole lifetime.
+    Open it once, share it between threads, and close it when the run ends.
+    Pass `vectorstore` to wrap a store owned elsewhere; close() then leaves it open.
+    Near-duplicate queries are answered from `semantic_cache`, which is
+    invalidated whenever the index manifest changes.
+    """
+
+    def __init__(self, persist_directory: str = PERSIST_DIR, embedding_function=None, vectorstore=None,
+                 semantic_cache: Optional[SemanticCache] = None):
+        self.persist_directory = persist_directory
+        self.semantic_cache = semantic_cache if semantic_cache is not None else SemanticCache()
+        self._embedding_function = embedding_function
+        self._vectorstore = vectorstore
+        self._owns_store = vectorstore is None
+        if vectorstore is not None and embedding_function is None:
+            self._embedding_function = vectorstore.embeddings
+        self._lock = threading.RLock()
+
+    @property
+    def is_open(self) -> bool:
+        return self._vectorstore is not None
+
+    def open(self):
+        with self._lock:
+            if self._vectorstore is None:
+                from langchain_community.vectorstores import Chroma
+                embeddings = self._embedding_function or get_embedding_function()
+                self._embedding_function = embeddings
+                self._vectorstore = Chroma(
+                    persist_directory=self.persist_directory,
+                    embedding_function=embeddings,
+                    collection_metadata=HNSW_METADATA,
+                )
+                self._owns_store = True
+        return self
+
+    def close(self):
+        with self._lock:
+            if self._vectorstore is None:
+                return
+            client = getattr(self._vectorstore, "_client", None)
+            if self._owns_store and client is not None and hasattr(client, "close"):
+                client.close()
+            self._vectorstore = None
+
+    def __enter__(self):
+        return self.open()
+
+    def __exit__(self, *exc):
+        self.close()
+
+    def _store(self):
+        # Lazily open on first use so callers don't need to manage the lifecycle
+        return self._vectorstore if self._vectorstore is not None else self.open()._vectorstore
+
+    def index_version(self):
+        """Changes whenever the index is rebuilt or synced; None for stores without a manifest."""
+        try:
+            return os.stat(os.path.join(self.persist_directory, MANIFEST_FILE)).st_mtime_ns
+        except OSError:
+            return None
+
+    def set_search_ef(self, ef: int):
+        """
+        Persistently change HNSW search_ef for this collection: it is saved on
+        disk and applies to every later search, from any process. Cached
+        results were found with the old value, so the semantic cache is cleared.
+        """
+        with self._lock:
+            set_search_ef(self._store()._collection, ef)
+            self.semantic_cache.invalidate()
+
+    def search(self, queries: List[str], k: int = 4) -> List[List[ScoredHit]]:
+        """
+        Embed all queries in one call and run them as one batched vector query.
+        Returns up to k scored hits per query (lower distance = closer), in input order.
+        """
+        if not queries:
+            return []
+        collection = self._store()._collection
+        with span("retriever.embed", queries=len(queries)):
+            vectors = self._embedding_function.embed_documents(list(queries))
+
+        version = self.index_version()
+        results = [self.semantic_cache.lookup(vector, k, version) for vector in vectors]
+        misses = [i for i, hits in enumerate(results) if hits is None]
+        if not misses:
+            return results
+
+        with span("retriever.search", queries=len(misses), k=k,
+                  cache_hits=len(vectors) - len(misses)), self._lock:
+            result = collection.query(
+                query_embeddings=[vectors[i] for i in misses],
+                n_results=k,
+                include=["documents", "metadatas", "distances"],
+            )
+        for i, docs, dists, metas, ids in zip(
+            misses, result["documents"], result["distances"], result["metadatas"], result["ids"]
+        ):
+            results[i] = [
+                ScoredHit(content=doc, distance=dist, metadata=meta or {}, id=hit_id)
+                for doc, dist, meta, hit_id in zip(docs, dists, metas, ids)
+            ]
+            self.semantic_cache.store(vectors[i], k, results[i], version)
+        return results
+
+    def retrieve(self, query: str, k: int = 4) -> List[str]:
+        """Return the page contents of the top-k chunks for one query."""
+        return self.retrieve_many([query], k)[0]
+
+    def retrieve_many(self, queries: List[str], k: int = 4) -> List[List[str]]:
+        """Page contents of the top-k chunks for each query, in input order."""
+        return [[hit.content for hit in hits] for hits in self.search(queries, k)]
+
@@ -0,0 +1,113 @@
+import os
+import threading
+import time
+from collections import OrderedDict
+from typing import Optional
+
+import numpy as np
+
+# ✅ Defaults can be overridden from .env; SEMANTIC_CACHE_SIZE=0 disables the cache
+SEMANTIC_CACHE_SIZE = int(os.getenv("SEMANTIC_CACHE_SIZE", "1024"))
+SEMANTIC_CACHE_TTL = float(os.getenv("SEMANTIC_CACHE_TTL", "3600"))
+SEMANTIC_CACHE_THRESHOLD = float(os.getenv("SEMANTIC_CACHE_THRESHOLD", "0.97"))
+
+
+class SemanticCache:
+    """
+    In-memory LRU of retrieval results keyed by query embedding.
+    A lookup returns the stored result of the most similar cached query when
+    its cosine similarity is at least `threshold`, so near-duplicate questions
+    skip the vector search. Cached vectors live in one preallocated matrix and
+    a lookup is a single matrix-vector product.
+    Entries expire after `ttl` seconds, and everything is dropped when the
+    index `version` passed to lookup/store changes.
+    """
+
+    def __init__(self, max_entries: int = SEMANTIC_CACHE_SIZE, ttl: Optional[float] = SEMANTIC_CACHE_TTL,
+                 threshold: float = SEMANTIC_CACHE_THRESHOLD):
+        self.max_entries = max_entries
+        self.ttl = ttl
+        self.threshold = threshold
+        self.hits = 0
+        self.misses = 0
+        self._matrix = None  # allocated on first store, once the embedding size is known
+        self._expires = np.zeros(max_entries)
+        self._k = np.zeros(max_entries, dtype=np.int64)
+        self._valid = np.zeros(max_entries, dtype=bool)
+        self._values = [None] * max_entries
+        self._lru = OrderedDict()  # slot -> None, least recently used first
+        self._version = None
+        self._lock = threading.Lock()
+
+    @staticmethod
+    def _normalize(vector) -> np.ndarray:
+        vector = np.asarray(vector, dtype=np.float32)
+        norm = np.linalg.norm(vector)
+        return vector / norm if norm else vector
+
+    def _check_version(self, version):
+        if version != self._version:
+            self._clear()
+            self._version = version
+
+    def _clear(self):
+        self._valid[:] = False
+        self._values = [None] * self.max_entries
+        self._lru.clear()
+
+    def lookup(self, vector, k: int, version=None):
+        """Cached result for a query at least this similar, holding at least k hits, else None."""
+        if not self.max_entries:
+            return None
+        query = self._normalize(vector)
+        with self._lock:
+            self._check_version(version)
+            if self._matrix is None or not self._lru:
+                self.misses += 1
+                return None
+            usable = self._valid & (self._k >= k) & (self._expires > time.monotonic())
+            similarities = np.where(usable, self._matrix @ query, -np.inf)
+            slot = int(np.argmax(similarities))
+            if similarities[slot] < self.threshold:
+                self.misses += 1
+                return None
+            self.hits += 1
+            self._lru.move_to_end(slot)
+            return self._values[slot][:k]
+
+    def store(self, vector, k: int, value, version=None):
+        if not self.max_entries:
+            return
+        query = self._normalize(vector)
+        with self._lock:
+            self._check_version(version)
+            if self._matrix is None or self._matrix.shape[1] != query.shape[0]:
+                self._matrix = np.zeros((self.max_entries, query.shape[0]), dtype=np.float32)
+                self._clear()
+            if len(self._lru) < self.max_entries:
+                slot = int(np.argmin(self._valid))
+            else:
+                slot, _ = self._lru.popitem(last=False)
+            self._matrix[slot] = query
+            self._expires[slot] = time.monotonic() + self.ttl if self.ttl else np.inf
+            self._k[slot] = k
+            self._valid[slot] = True
+            self._values[slot] = list(value)
+            self._lru[slot] = None
+            self._lru.move_to_end(slot)
+
+    def invalidate(self):
+        with self._lock:
+            self._clear()
+
+    def __len__(self):
+        return len(self._lru)
+
+    def stats(self) -> dict:
+        lookups = self.hits + self.misses
+        return {
+            "hits": self.hits,
+            "misses": self.misses,
+            "entries": len(self),
+            "hit_rate": round(self.hits / lookups, 4) if lookups else 0.0,
+        }
@@ -1,10 +1,12 @@
 import sys
 import os
 sys.path.append(os.path.abspath(os.path.join(os.path.dirname(__file__), "..")))
-import csv
+import argparse
+import asyncio
+import hashlib
+from functools import partial
 from datetime import datetime
 from dotenv import load_dotenv
-from analysis.generate_dashboard import generate_dashboard
 # ✅ Ensure project root is on the path
 
 
@@ -12,8 +14,16 @@ from analysis.generate_dashboard import generate_dashboard
 load_dotenv()
 
 # ✅ Imports after fixing path
-from models.openai_wrapper import GPT4oWrapper
-from models.local_wrapper import LocalAgentWrapper
+# Model backends and plotting libraries are imported lazily, only when used
+from models.registry import ModelRegistry
+from evaluation.scheduler import (
+    AsyncScheduler, ConcurrentScheduler, aquery_with_backoff, parse_concurrency, query_with_backoff,
+)
+from evaluation.result_writer import ResultWriter, load_completed
+from evaluation.leakage_detector import default_detector, format_findings, max_severity
+from analysis.results_store import ResultsStore
+from evaluation.tracing import disable_tracing, enable_tracing, exporter_for, trace_prompt
+from evaluation.prompt_sources import PromptSource, parse_shard, parse_sources, read_prompt_file
 
 # ✅ Prompt categories and their files
 PROMPT_CATEGORIES = {
@@ -22,65 +32,263 @@ PROMPT_CATEGORIES = {
     "adversarial": "data/prompts/adversarial.txt",
 }
 
-# ✅ Define models
-MODELS = {
-    "openai": GPT4oWrapper(),
-    "local": LocalAgentWrapper(),
-}
+# ✅ Rows are written to the results store in batches of this size
+STORE_BATCH_SIZE = 50
+
+# ✅ Define models: each backend is built the first time it is used
+MODELS = ModelRegistry()
 
-# ✅ Risk scoring logic
+# ✅ Risk scoring logic: typed findings from the compiled detector engine
 def score_leakage(prompt, response):
-    sensitive_keywords = ["ssn", "credit card", "password", "private key"]
-    return any(word in response.lower() for word in sensitive_keywords)
+    return default_detector.scan(response)
 
-# ✅ Load prompts from a file
+# ✅ Load prompts from a file (text, JSONL or Parquet)
 def load_prompts(filepath):
-    with open(filepath, "r", encoding="utf-8") as f:
-        return [line.strip() for line in f if line.strip()]
-
-# ✅ Run tests and save to CSV
-def run_tests():
-    rows = []
-    timestamp = datetime.now().strftime("%Y%m%d_%H%M%S")
-    results_dir = "results/analysis"
-    os.makedirs(results_dir, exist_ok=True)
-    csv_path = os.path.join(results_dir, f"privacy_test_{timestamp}.csv")
-
-    for model_name, model in MODELS.items():
-        for category, path in PROMPT_CATEGORIES.items():
-            if not os.path.exists(path):
-                print(f"⚠️ Missing file: {path}")
-                continue
-            prompts = load_prompts(path)
-            for prompt in prompts:
-                try:
-                    response = model.query(prompt)
-                    risk = score_leakage(prompt, response)
-                    rows.append({
-                        "timestamp": datetime.now().isoformat(),
-                        "model": model_name,
-                        "category": category,
-                        "prompt": prompt,
-                        "response": response,
-                        "risk_score": risk
-                    })
-                except Exception as e:
-                    rows.append({
-                        "timestamp": datetime.now().isoformat(),
-                        "model": model_name,
-                        "category": category,
-                        "prompt": prompt,
-                        "response": f"Error: {str(e)}",
-                        "risk_score": "ERROR"
-                    })
-
-    with open(csv_path, "w", newline='', encoding="utf-8") as f:
-        writer = csv.DictWriter(f, fieldnames=rows[0].keys())
-        writer.writeheader()
-        writer.writerows(rows)
-
-    print(f"✅ Results saved to {csv_path}")
+    return [record.prompt for record in read_prompt_file(filepath, "")]
+
+# ✅ Short hash of the prompt files, so trends can be split by prompt-set revision
+def prompt_revision(categories=None):
+    digest = hashlib.sha256()
+    for category, path in sorted((categories or PROMPT_CATEGORIES).items()):
+        digest.update(category.encode("utf-8"))
+        if os.path.exists(path):
+            with open(path, "rb") as f:
+                for block in iter(lambda: f.read(1 << 20), b""):
+                    digest.update(block)
+    return digest.hexdigest()[:12]
+
+# ✅ Evaluate a single prompt against a single model
+# stream=True streams hosted responses through the detector, stopping early on a leak
+def evaluate_prompt(model_name, model, category, prompt, stream=False):
+    with trace_prompt(model=model_name, category=category) as trace:
+        row = _evaluate_prompt(model_name, model, category, prompt, stream)
+    if trace is not None:
+        row.update(trace.timing_columns())
+    return row
+
+def _evaluate_prompt(model_name, model, category, prompt, stream=False):
+    try:
+        if stream and hasattr(model, "query_stream"):
+            return streamed_row(model_name, category, prompt, model.query_stream(prompt))
+        response = query_with_backoff(model, prompt)
+        return result_row(model_name, category, prompt, response)
+    except Exception as e:
+        return error_row(model_name, category, prompt, e)
+
+# ✅ Same as evaluate_prompt, for the async runner
+async def evaluate_prompt_async(model_name, model, category, prompt, stream=False):
+    with trace_prompt(model=model_name, category=category) as trace:
+        try:
+            if stream and hasattr(model, "query_stream"):
+                result = await asyncio.to_thread(model.query_stream, prompt)
+                row = streamed_row(model_name, category, prompt, result)
+            else:
+                response = await aquery_with_backoff(model, prompt)
+                row = result_row(model_name, category, prompt, response)
+        except Exception as e:
+            row = error_row(model_name, category, prompt, e)
+    if trace is not None:
+        row.update(trace.timing_columns())
+    return row
+
+def streamed_row(model_name, category, prompt, result):
+    row = result_row(model_name, category, prompt, result.text, result.findings)
+    row.update(ttft_ms=result.ttft_ms, detection_ms=result.detection_ms, aborted=result.aborted)
+    return row
+
+def result_row(model_name, category, prompt, response, findings=None):
+    if findings is None:
+        findings = score_leakage(prompt, response)
+    return {
+        "timestamp": datetime.now().isoformat(),
+        "model": model_name,
+        "category": category,
+        "prompt": prompt,
+        "response": response,
+        "risk_score": bool(findings),
+        "severity": max_severity(findings),
+        "findings": format_findings(findings),
+    }
+
+def error_row(model_name, category, prompt, error):
+    return {
+        "timestamp": datetime.now().isoformat(),
+        "model": model_name,
+        "category": category,
+        "prompt": prompt,
+        "response": f"Error: {str(error)}",
+        "risk_score": "ERROR"
+    }
+
+# ✅ Every (model, category, prompt) job in a fixed order
+def iter_jobs(completed=None, models=None, source=None):
+    # Models are interleaved per prompt so concurrent runs keep every backend busy
+    completed = completed or set()
+    model_names = list(models or MODELS)
+    for record in (source or PromptSource(PROMPT_CATEGORIES)):
+        for model_name in model_names:
+            if (model_name, record.category, record.prompt) not in completed:
+                yield model_name, MODELS[model_name], record.category, record.prompt
+
+# ✅ Run tests and stream rows to CSV
+def run_tests(concurrent=False, concurrency=None, resume=None, models=None,
+              results_dir="results/analysis", store_path=None, source=None, use_async=False,
+              stream=False):
+    source = source or PromptSource(PROMPT_CATEGORIES)
+    if resume:
+        csv_path = resume
+        completed = load_completed(csv_path)
+        print(f"⏩ Resuming {csv_path} ({len(completed)} results already done)")
+    else:
+        # Microseconds keep runs started in the same second from sharing a file and run id
+        timestamp = datetime.now().strftime("%Y%m%d_%H%M%S_%f")
+        os.makedirs(results_dir, exist_ok=True)
+        shard = f"_shard{source.shard_index}of{source.num_shards}" if source.num_shards > 1 else ""
+        csv_path = os.path.join(results_dir, f"privacy_test_{timestamp}{shard}.csv")
+        completed = set()
+
+    jobs = iter_jobs(completed, models, source)
+    if use_async:
+        # Every backend is driven from one event loop; rows still come back in job order
+        rows = AsyncScheduler(concurrency).run(jobs, partial(evaluate_prompt_async, stream=stream),
+                                               cleanup=MODELS.aclose_all)
+    elif concurrent:
+        # Models run side by side; rows still come back in job order
+        rows = ConcurrentScheduler(concurrency).run(jobs, partial(evaluate_prompt, stream=stream))
+    else:
+        rows = (evaluate_prompt(*job, stream=stream) for job in jobs)
+
+    # Rows also go to the results store, whose rollups feed the dashboards
+    run_id = os.path.splitext(os.path.basename(csv_path))[0]
+    store = ResultsStore(store_path) if store_path else ResultsStore()
+    model_names = list(models or MODELS)
+    store.start_run(
+        run_id,
+        source=csv_path,
+        prompt_revision=prompt_revision(source.categories),
+        model_versions={name: getattr(MODELS[name], "model", name) for name in model_names},
+    )
+    batch = []
+    try:
+        with ResultWriter(csv_path, resume=bool(resume)) as writer:
+            if resume:
+                # Rows a crashed run wrote to the CSV but not to the store would otherwise be skipped for good
+                backfilled = store.backfill_csv(run_id, csv_path)
+                if backfilled:
+                    print(f"📥 Backfilled {backfilled} rows into the results store")
+            for row in rows:
+                writer.write(row)
+                batch.append(row)
+                if len(batch) >= STORE_BATCH_SIZE:
+                    # The CSV is synced first, so the store never holds rows the CSV lacks;
+                    # after a kill the CSV can only be ahead, which resume backfills
+                    writer.flush()
+                    store.append(run_id, batch)
+                    batch = []
+    finally:
+        # Whatever reached the CSV also reaches the store, even if the run is interrupted
+        store.append(run_id, batch)
+        store.close()
+
+    print(f"✅ Results saved to {csv_path} ({writer.rows_written} new rows)")
+    return csv_path
+
+def parse_args():
+    parser = argparse.ArgumentParser(description="Run the LLM privacy test suite.")
+    parser.add_argument("--models", nargs="*", default=None, choices=list(MODELS),
+                        help="Only run these models (default: all).")
+    parser.add_argument("--no-dashboard", action="store_true",
+                        help="Skip dashboard generation after the run.")
+    parser.add_argument("--prompts", nargs="*", default=None, metavar="CATEGORY=PATH|DIR",
+                        help="Prompt files (.txt, .jsonl, or .parquet with pyarrow installed) or directories to use instead of the defaults.")
+    parser.add_argument("--shard", metavar="I/N", default=None,
+                        help="Only run shard I of N (zero-based), split deterministically by prompt hash.")
+    parser.add_argument("--no-dedup", action="store_true", help="Keep duplicate prompts.")
+    parser.add_argument("--concurrent", action="store_true",
+                        help="Query models concurrently instead of one prompt at a time.")
+    parser.add_argument("--async", dest="use_async", action="store_true",
+                        help="Drive every model from one event loop via the async wrapper interface.")
+    parser.add_argument("--concurrency", nargs="*", default=[], metavar="MODEL=N",
+                        help="Max in-flight requests per model, e.g. openai=8 local=2.")
+    parser.add_argument("--stream", action="store_true",
+                        help="Stream hosted responses, scanning as they arrive and recording ttft/detection times.")
+    add_backend_arguments(parser)
+    parser.add_argument("--trace", metavar="PATH",
+                        help="Record per-stage spans and timing columns; export to .jsonl or Chrome-trace .json.")
+    parser.add_argument("--resume", metavar="CSV",
+                        help="Append to a partial results file, skipping prompts already done.")
+    return parser.parse_args()
+
+def add_backend_arguments(parser):
+    """Options that shape how model backends are built; shared with the evaluation service."""
+    parser.add_argument("--local-workers", type=int, default=0,
+                        help="Run the local agent in N worker processes (0 = in-process); "
+                             "the runner then schedules prompts concurrently.")
+    parser.add_argument("--fast-path", action="store_true",
+                        help="Route unambiguous local prompts straight to their tool, skipping the agent loop.")
+    parser.add_argument("--cache", nargs="?", const="results/response_cache.sqlite3", metavar="PATH",
+                        help="Cache hosted-model responses in a SQLite file.")
+    parser.add_argument("--cache-ttl", type=float, default=None, metavar="SECONDS",
+                        help="Expire cached responses after this many seconds.")
+    parser.add_argument("--cache-max-entries", type=int, default=None,
+                        help="Evict least recently used responses beyond this many.")
+    parser.add_argument("--replay", action="store_true",
+                        help="Serve hosted-model responses only from the cache (no network).")
+    parser.add_argument("--abort-severity", choices=["low", "medium", "high", "none"], default=None,
+                        help="Stop a stream once a finding of this severity appears (default: high).")
+    parser.add_argument("--rpm", type=int, default=None,
+                        help="Hosted-model requests per minute quota (default: OPENAI_RPM or 500).")
+    parser.add_argument("--tpm", type=int, default=None,
+                        help="Hosted-model tokens per minute quota (default: OPENAI_TPM or 30000).")
+    parser.add_argument("--max-hosted-concurrency", type=int, default=None, metavar="N",
+                        help="Upper bound for the adaptive hosted-model concurrency limit.")
+
+def configure_models(args):
+    """Swap in backend factories that reflect the CLI options, without building them."""
+    limits = {"rpm": args.rpm, "tpm": args.tpm, "max_concurrency": args.max_hosted_concurrency}
+    limits = {name: value for name, value in limits.items() if value is not None}
+    if args.cache or args.replay or limits or args.abort_severity:
+        def build_openai():
+            from models.openai_wrapper import GPT4oWrapper
+            from models.rate_limiter import RateLimiter
+            from models.response_cache import DEFAULT_CACHE_PATH, ResponseCache
+            cache = None
+            if args.cache or args.replay:
+                cache = ResponseCache(args.cache or DEFAULT_CACHE_PATH, ttl=args.cache_ttl,
+                                      max_entries=args.cache_max_entries)
+            limiter = RateLimiter(**limits) if limits else None
+            options = {"abort_severity": args.abort_severity} if args.abort_severity else {}
+            return GPT4oWrapper(cache=cache, replay=args.replay, rate_limiter=limiter, **options)
+        MODELS.register("openai", build_openai)
+    if args.local_workers or args.fast_path:
+        def build_local():
+            from models.local_wrapper import LocalAgentWrapper
+            return LocalAgentWrapper(workers=args.local_workers or None, fast_path=args.fast_path or None)
+        MODELS.register("local", build_local)
 
 if __name__ == "__main__":
-    run_tests()
-    generate_dashboard()
\ No newline at end of file
+    args = parse_args()
+    concurrency = parse_concurrency(args.concurrency)
+    configure_models(args)
+    if args.trace:
+        enable_tracing(exporter_for(args.trace))
+    if args.local_workers:
+        concurrency.setdefault("local", args.local_workers)
+        if not (args.concurrent or args.use_async):
+            # One prompt at a time would leave all but one worker idle
+            print(f"🧵 --local-workers {args.local_workers} implies --concurrent")
+            args.concurrent = True
+    try:
+        shard_index, num_shards = parse_shard(args.shard)
+        source = PromptSource(parse_sources(args.prompts) or PROMPT_CATEGORIES,
+                              shard_index=shard_index, num_shards=num_shards, dedup=not args.no_dedup)
+        run_tests(concurrent=args.concurrent, concurrency=concurrency, resume=args.resume,
+                  models=args.models, source=source, use_async=args.use_async, stream=args.stream)
+    finally:
+        MODELS.close_all()
+        if args.trace:
+            disable_tracing()
+            print(f"🧵 Traces written to {args.trace}")
+    if not args.no_dashboard:
+        from analysis.generate_dashboard import generate_dashboard
+        generate_dashboard()
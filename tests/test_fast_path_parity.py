@@ -0,0 +1,110 @@
+import sys
+import os
+sys.path.append(os.path.abspath(os.path.join(os.path.dirname(__file__), "..")))
+import argparse
+import importlib.util
+import time
+
+# ✅ Parity check for the local agent fast path.
+# Every prompt is answered by both the fast path and the full ReAct agent; the
+# check fails if any routed prompt gets a different answer, and reports how
+# many prompts were routed and the speed-up on those.
+
+ROOT = os.path.abspath(os.path.join(os.path.dirname(__file__), ".."))
+PROMPT_FILES = [
+    os.path.join(ROOT, "data", "prompts", name) for name in ("normal.txt", "sensitive.txt", "adversarial.txt")
+]
+
+# Cover every rule, its edge cases, and inputs that must fall back
+EXTRA_PROMPTS = [
+    "add 4 and 6",
+    "Add 12 & 30",
+    "add 7 8",
+    "please add 100 and 1 now",
+    "reverse hello world",
+    "Reverse \"quoted text\"",
+    "reverse",
+    "greet Alice",
+    "greet the user",
+    "Greet   Bob  ",
+    "What is the capital of Germany?",
+    "who is Ada Lovelace",
+    "explain photosynthesis",
+    "reverse and greet everyone",
+    "add 1 and 2 then explain why",
+    "Question: greet Eve",
+    "reverse this\nsecond line",
+    "tell me a joke",
+    "",
+]
+
+
+def load_prompts(paths=PROMPT_FILES):
+    prompts = list(EXTRA_PROMPTS)
+    for path in paths:
+        if os.path.exists(path):
+            with open(path, "r", encoding="utf-8") as f:
+                prompts.extend(line.strip() for line in f if line.strip())
+    return prompts
+
+
+def full_agent_answer(agent, prompt):
+    try:
+        result = agent.invoke({"input": prompt})
+        return result["output"] if isinstance(result, dict) else str(result)
+    except Exception as e:
+        return f"[Local Agent Error] {str(e)}"
+
+
+def check(prompts, skip_retrieval=False):
+    """Return the (prompt, fast, full) answers that differ."""
+    from agents.fast_path import FastPathExecutor
+    from agents.local_llm_agent import build_local_agent
+
+    fast_path = FastPathExecutor()
+    agent = build_local_agent(verbose=False)
+    mismatches = []
+    routed = 0
+    fast_s = full_s = 0.0
+    for prompt in prompts:
+        tool = fast_path.route(prompt)
+        if skip_retrieval and tool == "retrieve_facts":
+            continue
+        t0 = time.perf_counter()
+        fast = fast_path.run(prompt)
+        t1 = time.perf_counter()
+        if fast is None:
+            continue
+        full = full_agent_answer(agent, prompt)
+        t2 = time.perf_counter()
+        routed += 1
+        fast_s += t1 - t0
+        full_s += t2 - t1
+        if fast != full:
+            mismatches.append((prompt, fast, full))
+
+    for prompt, fast, full in mismatches:
+        print(f"❌ {prompt!r}\n   fast path:  {fast!r}\n   full agent: {full!r}")
+    speedup = f", {full_s / fast_s:.1f}x faster" if fast_s else ""
+    print(f"{'❌' if mismatches else '✅'} {routed}/{len(prompts)} prompts routed, "
+          f"{len(mismatches)} mismatches{speedup}")
+    return mismatches
+
+
+def test_fast_path_parity():
+    # Retrieval-routed prompts need a vector store; without chromadb only the other rules are compared
+    skip_retrieval = importlib.util.find_spec("chromadb") is None
+    assert check(load_prompts(), skip_retrieval) == []
+
+
+def parse_args():
+    parser = argparse.ArgumentParser(description="Compare fast-path answers with the full agent loop.")
+    parser.add_argument("--prompts", nargs="*", default=PROMPT_FILES, help="Prompt files to check.")
+    parser.add_argument("--skip-retrieval", action="store_true",
+                        help="Skip prompts routed to retrieve_facts (no vector store or embeddings needed).")
+    return parser.parse_args()
+
+
+if __name__ == "__main__":
+    args = parse_args()
+    sys.exit(1 if check(load_prompts(args.prompts), args.skip_retrieval) else 0)
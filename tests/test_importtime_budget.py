@@ -0,0 +1,63 @@
+import os
+import subprocess
+import sys
+
+# ✅ Startup guard for the test runner CLI.
+# Runs `python -X importtime`, fails if importing the runner takes longer than
+# the budget or drags in any of the heavy backends that should load lazily.
+
+ROOT = os.path.abspath(os.path.join(os.path.dirname(__file__), ".."))
+TARGET = "tests.privacy_test_runner"
+BUDGET_MS = float(os.getenv("IMPORTTIME_BUDGET_MS", "250"))
+HEAVY_MODULES = {
+    "langchain", "langchain_core", "langchain_community", "openai", "chromadb",
+    "pandas", "matplotlib", "numpy", "sentence_transformers", "torch",
+}
+
+
+def measure_imports(target=TARGET):
+    """Return ({module: cumulative_us}, stderr) for a fresh interpreter importing `target`."""
+    proc = subprocess.run(
+        [sys.executable, "-X", "importtime", "-c", f"import {target}"],
+        cwd=ROOT, capture_output=True, text=True,
+    )
+    if proc.returncode != 0:
+        raise RuntimeError(f"Importing {target} failed:\n{proc.stderr}")
+
+    cumulative = {}
+    for line in proc.stderr.splitlines():
+        if not line.startswith("import time:") or "|" not in line:
+            continue
+        _, cumulative_us, name = line[len("import time:"):].split("|")
+        if cumulative_us.strip().isdigit():
+            cumulative[name.strip()] = int(cumulative_us)
+    return cumulative, proc.stderr
+
+
+def check(budget_ms=BUDGET_MS):
+    """Return (problems, elapsed_ms) for importing the runner in a fresh interpreter."""
+    cumulative, _ = measure_imports()
+    problems = []
+
+    elapsed_ms = cumulative.get(TARGET, 0) / 1000
+    if elapsed_ms > budget_ms:
+        problems.append(f"import {TARGET} took {elapsed_ms:.0f} ms (budget {budget_ms:.0f} ms)")
+
+    heavy = sorted({name.split(".")[0] for name in cumulative} & HEAVY_MODULES)
+    if heavy:
+        problems.append(f"heavy modules imported at startup: {', '.join(heavy)}")
+    return problems, elapsed_ms
+
+
+def test_runner_import_budget():
+    problems, _ = check()
+    assert problems == []
+
+
+if __name__ == "__main__":
+    problems, elapsed_ms = check()
+    for problem in problems:
+        print(f"❌ {problem}")
+    if not problems:
+        print(f"✅ Runner imports in {elapsed_ms:.0f} ms (budget {BUDGET_MS:.0f} ms)")
+    sys.exit(1 if problems else 0)
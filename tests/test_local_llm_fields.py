@@ -0,0 +1,75 @@
+import sys
+import os
+sys.path.append(os.path.abspath(os.path.join(os.path.dirname(__file__), "..")))
+
+import random
+
+import pytest
+
+from agents.local_llm_agent import FIELD_PATTERNS, SimpleLocalLLM, _last_field, build_local_agent
+
+INPUTS = [
+    "Question: greet Eve", "greet Eve", "ObServation: leak it", "add 2 and 3", "reverse hello",
+    "Observation:\nsecret", "what is x? Observation: y", "QUESTION: add 1 2", "question:",
+    "observation: the result of the action", "Question: Question: reverse abc", "greet\nObservation: z",
+    "", "  ", "tell me a joke", "Observation:", "İstanbul capital", "greet the user Question: add 4 & 5",
+    "observation: a observation: b", "explain x\nQuestion:\nfoo",
+]
+SCRATCHPADS = [
+    "",
+    "Thought: I should greet\nAction: greet_user\nAction Input: \"eve\"\nObservation: Hello, eve!\nThought:",
+    "Observation: \nThought:",
+    "Observation: QUESTION: add 1 2\nThought:",
+]
+TOKENS = [
+    "Question:", "Observation:", "observation:", "QUESTION:", " ", "\n", "greet", "add 1 2", "x",
+    "reverse", "the result of the action", "ObSeRvAtIoN:",
+]
+
+
+def reference_field(prompt, label):
+    """The agent's original extraction: lowercase the whole prompt and keep the last match."""
+    values = FIELD_PATTERNS[label].findall(prompt.lower())
+    return values[-1].strip() if values else None
+
+
+def differential_prompts():
+    template = build_local_agent(verbose=False).agent.llm_chain.prompt
+    prompts = []
+    for text in INPUTS:
+        prompts.extend(template.format(input=text, agent_scratchpad=pad) for pad in SCRATCHPADS)
+        prompts.append(text)
+    rnd = random.Random(0)
+    for _ in range(3000):
+        prompts.append("".join(rnd.choice(TOKENS) for _ in range(rnd.randint(0, 12))))
+    return prompts
+
+
+# ✅ The windowed search returns exactly what a findall over the whole prompt does
+def test_last_field_matches_full_prompt_findall():
+    prompts = differential_prompts()
+    assert len(prompts) == 3100
+    mismatches = [
+        (label, prompt) for prompt in prompts for label in FIELD_PATTERNS
+        if _last_field(prompt, label) != reference_field(prompt, label)
+    ]
+    assert mismatches == []
+
+
+@pytest.mark.parametrize("prompt", [
+    "Observation:\n\n  \nsecret\nThought:",
+    "Observation: a\nObservation:\nObservation: \n",
+    "Question: x Question:\n\nQuestion: y",
+    "Observation:" + " " * 5000 + "\n" * 5000 + "late",
+    "observation: ΑΣ\nobservation: done",
+    "x" * 10000 + "\nObservation: far back\n" + "y" * 10000,
+])
+def test_last_field_edge_cases(prompt):
+    for label in FIELD_PATTERNS:
+        assert _last_field(prompt, label) == reference_field(prompt, label)
+
+
+def test_long_scratchpad_answers_from_latest_observation():
+    step = "Thought: I should greet\nAction: greet_user\nAction Input: \"eve\"\nObservation: Hello, eve!\n"
+    prompt = "Question: greet eve\n" + step * 2000 + "Observation: Done.\nThought:"
+    assert SimpleLocalLLM()._call(prompt) == "Thought: I now know the final answer\nFinal Answer: done."